@@ -0,0 +1,262 @@
+"""
+Benchmark de las cinco implementaciones del tres en raya.
+
+Ejecuta un corpus fijo de posiciones por las funciones críticas de cada versión
+(detección de ganador, lista de casillas libres, Minimax desde el tablero vacío y
+desde media partida, y selección de movimiento aleatorio) y muestra operaciones
+por segundo, nodos por segundo y memoria máxima.
+
+    python benchmark.py                          # Show the results
+    python benchmark.py --save baseline.json     # Save them as a baseline
+    python benchmark.py --compare baseline.json  # Fail if something got slower
+"""
+
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ttt_v21_oop"))
+
+import ttt_v11_list_of_lists as v11
+import ttt_v12_dict as v12
+import ttt_v13a_minimax as v13a
+import ttt_v13b_minimax as v13b
+from board_backends import BOARD_BACKENDS
+from game_board import GameBoard
+from player import RandomMachinePlayer, MinimaxMachinePlayer
+from search import AlphaBetaEngine
+from symbol import Symbol
+from transposition_table import TranspositionTable
+
+CORPUS_SEED = 2024
+CORPUS_SIZE = 200
+MIN_TIME = 0.2  # Seconds each benchmark runs for (at least one round)
+DEFAULT_THRESHOLD = 0.25  # Allowed slowdown before a comparison fails
+
+Benchmark = namedtuple("Benchmark", ["name", "run"])  # run() -> (operations, nodes)
+
+
+# ------------------------------ Corpus ------------------------------
+
+def build_corpus(seed=CORPUS_SEED, size=CORPUS_SIZE):
+    """Unfinished positions of random games, as {cell: 'X'/'O'/None} dicts"""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < size:
+        board = {cell: None for cell in range(1, 10)}
+        symbol = "X"
+        for cell in rng.sample(range(1, 10), rng.randint(0, 8)):
+            board[cell] = symbol
+            symbol = "O" if symbol == "X" else "X"
+            if v12.check_winner(board):
+                break
+        if not v12.check_winner(board) and not v12.is_board_completed(board):
+            positions.append(board)
+    return positions
+
+
+def to_list_of_lists(board):
+    return [[board[3 * row + col + 1] or " " for col in range(3)] for row in range(3)]
+
+
+def to_game_board(board, factory=GameBoard):
+    game_board = factory()
+    for cell, value in board.items():
+        if value is not None:
+            game_board[cell] = Symbol(value)
+    return game_board
+
+
+def to_script_board(board, module):
+    """A single-file version's Board (a dict with counters) holding the position"""
+    script_board = module.Board()
+    for cell, value in board.items():
+        if value is not None:
+            script_board[cell] = value
+    return script_board
+
+
+def mid_game(corpus):
+    """Positions where X (the machine in the single-file versions) is to move"""
+    return [board for board in corpus if 2 <= sum(v is not None for v in board.values()) <= 4
+            and sum(v == "X" for v in board.values()) == sum(v == "O" for v in board.values())][:10]
+
+
+# ------------------------------ Benchmarks ------------------------------
+
+def count_calls(module, name):
+    """Wrap module.name so recursive calls through the global are counted"""
+    original = getattr(module, name)
+    counter = [0]
+
+    def wrapper(*args, **kwargs):
+        counter[0] += 1
+        return original(*args, **kwargs)
+
+    setattr(module, name, wrapper)
+    return counter, lambda: setattr(module, name, original)
+
+
+def script_minimax(module, positions):
+    """Cold live search with a single-file version (no perfect-play table, empty cache)"""
+    def run():
+        counter, restore = count_calls(module, "minimax")
+        default_table, module.default_table = module.default_table, lambda: None
+        try:
+            for board in positions:
+                module.transpositions.clear()
+                module.minimax_move(to_script_board(board, module), engine=None)
+        finally:
+            module.default_table = default_table
+            restore()
+        return len(positions), counter[0]
+    return run
+
+
+def player_minimax(positions, engine_factory):
+    def run():
+        nodes = 0
+        for board in positions:
+            engine = engine_factory()
+            player = MinimaxMachinePlayer(Symbol.AI, table=TranspositionTable(),
+                                          use_perfect_play=False, engine=engine)
+            player._select_move(board)
+            nodes += player.last_search.nodes
+        return len(positions), nodes
+    return run
+
+
+def repeat(function, positions):
+    def run():
+        for board in positions:
+            function(board)
+        return len(positions), 0
+    return run
+
+
+def benchmarks(corpus):
+    empty = [{cell: None for cell in range(1, 10)}]
+    middle = mid_game(corpus)
+    lists = [to_list_of_lists(board) for board in corpus]
+    dict_boards = [to_game_board(board) for board in corpus]
+    random_player = RandomMachinePlayer(Symbol.AI)
+    oop_empty, oop_middle = [to_game_board(b) for b in empty], [to_game_board(b) for b in middle]
+
+    yield Benchmark("v11.winner", repeat(lambda b: (v11.victory_for(b, "X"), v11.victory_for(b, "O")), lists))
+    yield Benchmark("v11.free_cells", repeat(v11.make_list_of_free_fields, lists))
+    yield Benchmark("v11.random_move", repeat(lambda b: v11.draw_move(copy.deepcopy(b)), lists))
+    yield Benchmark("v12.winner", repeat(v12.check_winner, corpus))
+    yield Benchmark("v12.free_cells", repeat(v12.list_of_free_cells, corpus))
+    yield Benchmark("v12.random_move", repeat(lambda b: v12.machine_move(dict(b)), corpus))
+    for name, module in (("v13a", v13a), ("v13b", v13b)):
+        script_boards = [to_script_board(board, module) for board in corpus]
+        yield Benchmark(f"{name}.winner", repeat(module.check_winner, script_boards))
+        yield Benchmark(f"{name}.free_cells", repeat(module.list_of_free_cells, script_boards))
+        yield Benchmark(f"{name}.random_move", repeat(module.random_move, script_boards))
+        yield Benchmark(f"{name}.minimax_empty", script_minimax(module, empty))
+        yield Benchmark(f"{name}.minimax_mid", script_minimax(module, middle))
+    for backend, factory in BOARD_BACKENDS.items():
+        try:
+            boards = [to_game_board(board, factory) for board in corpus]
+        except ImportError:
+            continue  # Optional dependency (NumPy) not installed
+        yield Benchmark(f"v21_{backend}.winner", repeat(lambda b: b.check_winner(), boards))
+        yield Benchmark(f"v21_{backend}.free_cells", repeat(lambda b: b.get_free_cells(), boards))
+    yield Benchmark("v21.random_move", repeat(random_player._select_move, dict_boards))
+    for name, factory in (("minimax", lambda: None), ("alphabeta", AlphaBetaEngine)):
+        yield Benchmark(f"v21.{name}_empty", player_minimax(oop_empty, factory))
+        yield Benchmark(f"v21.{name}_mid", player_minimax(oop_middle, factory))
+
+
+# ------------------------------ Runner ------------------------------
+
+def measure(benchmark, min_time=MIN_TIME):
+    operations = nodes = 0
+    started = time.perf_counter()
+    while True:
+        ops, visited = benchmark.run()
+        operations += ops
+        nodes += visited
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+
+    tracemalloc.start()  # A separate round: tracing slows everything down
+    benchmark.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {"ops_per_sec": operations / elapsed, "peak_kib": peak / 1024}
+    if nodes:
+        result["nodes_per_sec"] = nodes / elapsed
+        result["nodes_per_op"] = nodes / operations
+    return result
+
+
+def run_all(selected=None, min_time=MIN_TIME):
+    results = {}
+    for benchmark in benchmarks(build_corpus()):
+        if selected and not any(part in benchmark.name for part in selected):
+            continue
+        results[benchmark.name] = measure(benchmark, min_time)
+        print(format_result(benchmark.name, results[benchmark.name]), flush=True)
+    return results
+
+
+def format_result(name, result):
+    line = f"{name:<26} {result['ops_per_sec']:>14,.1f} ops/s {result['peak_kib']:>10,.1f} KiB"
+    if "nodes_per_sec" in result:
+        line += f" {result['nodes_per_sec']:>14,.0f} nodes/s {result['nodes_per_op']:>10,.0f} nodes/op"
+    return line
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return the names of the benchmarks slower than baseline beyond threshold"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        ratio = result["ops_per_sec"] / reference["ops_per_sec"]
+        if ratio < 1 - threshold:
+            regressions.append(name)
+            print(f"REGRESSION {name}: {ratio:.0%} of baseline speed")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Tic-Tac-Toe implementations")
+    parser.add_argument("--save", metavar="PATH", help="save the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction (default: %(default)s)")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME,
+                        help="seconds per benchmark (default: %(default)s)")
+    parser.add_argument("only", nargs="*", help="run only benchmarks whose name contains these")
+    args = parser.parse_args()
+
+    results = run_all(args.only, args.min_time)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            }, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,12 @@ from random import choice
 MACHINE = "X"
 HUMAN = "O"
 
+WINNING_COMBINATIONS = (
+    (1, 2, 3), (4, 5, 6), (7, 8, 9),  # Rows
+    (1, 4, 7), (2, 5, 8), (3, 6, 9),  # Columns
+    (1, 5, 9), (3, 5, 7),             # Diagonals
+)
+
 # ------------------------------ Lógica ------------------------------
 
 def is_taken_cell(board, cell):
@@ -18,20 +24,14 @@ def list_of_free_cells(board):
 
 
 def is_first_move(board):
-    return len(list_of_free_cells(board)) == 9
+    return all(value is None for value in board.values())
 
 
 def is_board_completed(board):
-    return len(list_of_free_cells(board)) == 0
+    return None not in board.values()
 
 
 def check_winner(board):
-        
-    WINNING_COMBINATIONS = [
-        (1, 2, 3), (4, 5, 6), (7, 8, 9),  # Rows
-        (1, 4, 7), (2, 5, 8), (3, 6, 9),  # Columns
-        (1, 5, 9), (3, 5, 7)              # Diagonals
-]
     for combination in WINNING_COMBINATIONS:
         if all(board[cell] == board[combination[0]] != None for cell in combination):
             return board[combination[0]]
@@ -1,57 +1,137 @@
 """
 Versión que implementa el algoritmo Minimax para la lógica de la máquina. No puede perder. Además, permite elegir quién empieza la partida.
 
+Las posiciones ya evaluadas se guardan en una tabla de transposiciones. Como una posición y sus rotaciones o reflexiones tienen el mismo valor, se guardan todas bajo una misma clave (su forma canónica): el hash Zobrist de la posición, actualizado en cada movimiento. La tabla (TranspositionTable, compartida con la versión OOP) tiene un tamaño máximo y una política de reemplazo, y cuenta sus aciertos y fallos.
+
+Si existe la tabla precalculada de juego perfecto (`python ttt_v21_oop/perfect_play.py`), la máquina la consulta en lugar de buscar; si falta o está desactualizada, se usa la búsqueda Minimax.
+
+El tablero (Board) es un diccionario que además lleva el número de movimientos y las fichas de cada jugador en cada línea, actualizados en cada asignación: comprobar el ganador, el tablero lleno o el primer movimiento no recorre las casillas. Minimax juega y deshace con make_move/undo_move.
+
 Programación recursiva en python: https://www.youtube.com/watch?v=cgg1ACU49aQ
 Minimax en el tres en raya: https://www.youtube.com/watch?v=SLgZhpDsrfc
 
-Variantes de esta implementación:
+Variantes de esta implementación (ambas en el motor compartido ttt_v21_oop/search.py, que es el que usa la máquina):
 - Usar la profundidad del árbol de juego para priorizar ganar en menos movimientos.
 - Usar alfa-beta pruning para reducir el número de nodos evaluados.
+La función minimax de este fichero se mantiene como versión de referencia sin poda.
 """
 
 from random import choice
 import math
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ttt_v21_oop"))
+from perfect_play import default_table # Precomputed perfect play, shared with the OOP version
+from search import DEFAULT_ENGINE # Alpha-beta engine, shared with the OOP version
+from transposition_table import TranspositionTable, ZOBRIST # Symmetry-aware Zobrist keys, shared with the OOP version
 
 # ------------------------------ Lógica ------------------------------
 
 AI = "X"
 HUMAN = "O"
 
-def minimax(board, is_maximizing):
-    if check_winner(board) == AI:
+WINNING_COMBINATIONS = (
+    (1, 2, 3), (4, 5, 6), (7, 8, 9),  # Rows
+    (1, 4, 7), (2, 5, 8), (3, 6, 9),  # Columns
+    (1, 5, 9), (3, 5, 7),             # Diagonals
+)
+# Indices of the combinations through each cell
+LINES_THROUGH = {cell: tuple(index for index, line in enumerate(WINNING_COMBINATIONS) if cell in line)
+                 for cell in range(1, 10)}
+
+
+class Board(dict):
+    """
+    Cells 1-9 -> symbol (or None), plus the move count, the stones of each
+    symbol on every line and the lines each symbol completes, updated on
+    every assignment so the winner, full and first-move checks are O(1).
+    """
+    def __init__(self):
+        super().__init__((cell, None) for cell in range(1, 10))
+        self.moves = 0
+        self.line_counts = {AI: [0] * len(WINNING_COMBINATIONS), HUMAN: [0] * len(WINNING_COMBINATIONS)}
+        self.completed = {AI: 0, HUMAN: 0}
+
+    def __setitem__(self, cell, symbol):
+        previous = self[cell]
+        if previous is not None:
+            self.moves -= 1
+            self._count(cell, previous, -1)
+        super().__setitem__(cell, symbol)
+        if symbol is not None:
+            self.moves += 1
+            self._count(cell, symbol, 1)
+
+    def _count(self, cell, symbol, delta):
+        counts = self.line_counts[symbol]
+        for index in LINES_THROUGH[cell]:
+            if counts[index] == 3:
+                self.completed[symbol] -= 1
+            counts[index] += delta
+            if counts[index] == 3:
+                self.completed[symbol] += 1
+
+TABLE_ENTRIES = 1 << 12 # Size cap of the transposition table
+TABLE_POLICY = "depth" # Replacement policy: "depth" keeps the entry with more moves left, "always" the newest
+
+# Positions already evaluated, shared by every search of the game (and later games); counts its hits and misses
+transpositions = TranspositionTable(TABLE_ENTRIES, TABLE_POLICY)
+
+
+def minimax(board, is_maximizing, hashes=None):
+    winner = check_winner(board) # Checked once per node
+    if winner == AI:
         return 1 # Machine wins -> increase score
-    if check_winner(board) == HUMAN:
+    if winner == HUMAN:
         return -1 # Human wins -> decrease score
     if is_board_completed(board):
         return 0 # Draw -> neutral score
 
+    if hashes is None:
+        hashes = ZOBRIST.board_hashes(board) # Only at the root: moves update them below
+    key, _ = ZOBRIST.canonical(hashes, AI if is_maximizing else HUMAN)
+    entry = transpositions.probe(key)
+    if entry is not None: # This position (or a symmetric one) was already evaluated
+        return entry.score
+
     if is_maximizing: # Machine's turn
         best_score = -math.inf
         for cell in list_of_free_cells(board): # For each possible move
-            board[cell] = AI # Make the move
-            score = minimax(board, False) # Evaluate the move
-            board[cell] = None # Leave the cell as it was
+            make_move(board, cell, AI) # Make the move
+            score = minimax(board, False, ZOBRIST.play(hashes, cell, AI)) # Evaluate the move
+            undo_move(board, cell) # Leave the cell as it was
             best_score = max(score, best_score) # Keep the best score of that branch
-        return best_score # Return the best score that can be achieved
     else: # Human's turn
         best_score = math.inf
         for cell in list_of_free_cells(board):
-            board[cell] = HUMAN
-            score = minimax(board, True)
-            board[cell] = None
+            make_move(board, cell, HUMAN)
+            score = minimax(board, True, ZOBRIST.play(hashes, cell, HUMAN))
+            undo_move(board, cell)
             best_score = min(score, best_score)
-        return best_score
+
+    transpositions.store(key, len(list_of_free_cells(board)), best_score) # Remember it for later searches
+    return best_score # Return the best score that can be achieved
 
 
 # Agente Minimax: retorna el mejor movimiento para la IA
-def minimax_move(board):
+def minimax_move(board, engine=DEFAULT_ENGINE): # engine=None uses the plain minimax above
+    table = default_table() # None if the table file is missing or stale
+    if table is not None:
+        move = table.best_move(board, AI)
+        if move is not None:
+            return move
+
+    if engine is not None: # Alpha-beta search with depth-aware scores
+        return engine.search(board, AI).move
+
     best_move = None
     best_value = -math.inf
     
     for i in list_of_free_cells(board):
-        board[i] = AI  # Make the move directly on the original board
+        make_move(board, i, AI)  # Make the move directly on the original board
         move_value = minimax(board, False)
-        board[i] = None  # Undo the move
+        undo_move(board, i)  # Undo the move
         if move_value > best_value:
             best_value = move_value
             best_move = i
@@ -67,32 +147,36 @@ def list_of_free_cells(board):
     return [i for i in range(1, 10) if not is_taken_cell(board, i)]
 
 
+def make_move(board, cell, symbol):
+    board[cell] = symbol
+
+
+def undo_move(board, cell):
+    board[cell] = None
+
+
 def is_first_move(board):
-    return len(list_of_free_cells(board)) == 9
+    return board.moves == 0
 
 
 def is_board_completed(board):
-    return len(list_of_free_cells(board)) == 0
+    return board.moves == 9
 
 
 def check_winner(board):
-        
-    WINNING_COMBINATIONS = [
-        (1, 2, 3), (4, 5, 6), (7, 8, 9),  # Rows
-        (1, 4, 7), (2, 5, 8), (3, 6, 9),  # Columns
-        (1, 5, 9), (3, 5, 7)              # Diagonals
-]
-    for combination in WINNING_COMBINATIONS:
-        if all(board[cell] == board[combination[0]] != None for cell in combination):
-            return board[combination[0]]
+    if board.completed[AI]:
+        return AI
+    if board.completed[HUMAN]:
+        return HUMAN
+    return None
 
 
 def random_move(board):
-    return board[choice(list_of_free_cells(board))]
+    return choice(list_of_free_cells(board))
 
 
 def machine_move(board, level="minimax"):
-    board[random_move(board) if level == "random" else minimax_move(board)] = AI
+    make_move(board, random_move(board) if level == "random" else minimax_move(board), AI)
 
 
 # ------------------------------ UI ------------------------------
@@ -140,7 +224,7 @@ def enter_move(board):
                 break
         except ValueError:
             print(INVALID_INPUT_MSG)
-    board[int(cell)] = HUMAN
+    make_move(board, int(cell), HUMAN)
     
 
 def human_starts():
@@ -148,7 +232,7 @@ def human_starts():
 
 
 def main():
-    board = {i: None for i in range(1, 10)}
+    board = Board()
     turn = HUMAN if human_starts() else AI
 
     display_board(board)
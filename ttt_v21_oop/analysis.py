@@ -0,0 +1,284 @@
+"""
+Batch position analysis: the exact value of every legal move.
+
+A position is written as one character per cell, row by row ('X', 'O', and
+'.' or '-' for an empty cell), optionally followed by a space and the side
+to move; without it X moves when both sides have as many stones.
+
+``Analyzer.analyze`` takes many positions at once. Positions equal under a
+rotation or reflection are solved once, for their canonical form, and the
+values of their moves are mapped back to each position's own cells. Solved
+positions stay in a memo cache shared by every call (one analyzer per board
+size, see ``analyzer_for``); a tablebase (see retrograde.py) is used when
+there is one for the board.
+
+Each result gives, for the side to move, the position's result ("win",
+"draw" or "loss") and its distance in plies, and the same for every legal
+move. Scores follow perfect_play.py: ``size + 1 - n`` for a win in ``n``
+plies, ``n - size - 1`` for a loss and 0 for a draw.
+
+Usage::
+
+    python analysis.py [FILE] [--rows R] [--cols C] [--k K] [--workers N]
+
+reads positions from FILE (or stdin), one per line, and writes one JSON
+line per position, in order, analysing each chunk of lines as one batch
+(in worker processes with ``--workers``).
+"""
+
+import argparse
+import json
+import sys
+from collections import deque, namedtuple
+from itertools import islice
+from board_geometry import get_geometry
+from parallel_search import get_pool
+from retrograde import DRAW, WIN, LOSS, tablebase_for
+
+RESULT_NAMES = {WIN: "win", DRAW: "draw", LOSS: "loss"}
+CHUNK_LINES = 1000  # Positions per task in the CLI
+MAX_CACHE = 1 << 22  # Cached positions per analyzer before the cache is cleared
+
+MoveValue = namedtuple("MoveValue", ["result", "distance", "score"])
+Analysis = namedtuple("Analysis", ["position", "to_move", "value", "moves"])  # moves: cell -> MoveValue
+
+
+def _won(bits, geometry):
+    return any(bits & mask == mask for mask in geometry.line_masks)
+
+
+def parse_position(text, geometry):
+    """(side to move, its bitboard, the other side's bitboard) of a position string"""
+    cells, _, mover = text.strip().partition(" ")
+    if len(cells) != geometry.size:
+        raise ValueError(f"Expected {geometry.size} cells, got {len(cells)}")
+    bits = {'X': 0, 'O': 0}
+    for index, char in enumerate(cells.upper()):
+        if char in "XO":
+            bits[char] |= 1 << index
+        elif char not in ".-":
+            raise ValueError(f"Invalid cell {char!r}")
+    x_count, o_count = bits['X'].bit_count(), bits['O'].bit_count()
+    mover = mover.strip().upper() or ('X' if x_count == o_count else 'O')
+    if mover not in ('X', 'O'):
+        raise ValueError(f"Invalid side to move: {mover!r}")
+    other = 'O' if mover == 'X' else 'X'
+    if bits[mover].bit_count() not in (bits[other].bit_count(), bits[other].bit_count() - 1):
+        raise ValueError(f"{mover} cannot be to move with these stone counts")
+    if _won(bits[mover], geometry):
+        raise ValueError(f"{mover} cannot be to move with a line already completed")
+    return mover, bits[mover], bits[other]
+
+
+class Analyzer:
+    """Exact solver for one board size, memoising canonical positions"""
+    def __init__(self, geometry):
+        self.geometry = geometry
+        self.cache = {}  # Canonical key -> (result, distance) for the side to move
+        self._tablebase = tablebase_for(geometry)
+        # Per symmetry, the bit each bit moves to
+        self._bit_maps = tuple(tuple(1 << (permutation[cell] - 1) for cell in geometry.cells)
+                               for permutation in geometry.symmetries)
+
+    def _transform(self, bits, bit_map):
+        moved = 0
+        while bits:
+            low = bits & -bits
+            bits ^= low
+            moved |= bit_map[low.bit_length() - 1]
+        return moved
+
+    def canonical(self, mover, other):
+        """(key, symmetry index) of the smallest image of the position"""
+        size = self.geometry.size
+        return min((self._transform(mover, bit_map) | self._transform(other, bit_map) << size, index)
+                   for index, bit_map in enumerate(self._bit_maps))
+
+    def value(self, mover, other):
+        """(result, distance) of the position for the side to move"""
+        if _won(other, self.geometry):
+            return LOSS, 0
+        free = self.geometry.full_mask & ~(mover | other)
+        if not free:
+            return DRAW, 0
+        key = self.canonical(mover, other)[0]
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        found = self._tablebase.probe(mover, other) if self._tablebase is not None else None
+        if found is None:
+            best = None
+            while free:
+                low = free & -free
+                free ^= low
+                result = _negate(self.value(other, mover | low))
+                if best is None or _rank(result) > _rank(best):
+                    best = result
+            found = best
+        if len(self.cache) >= MAX_CACHE:
+            self.cache.clear()
+        self.cache[key] = found
+        return found
+
+    def score(self, result, distance) -> int:
+        if result == WIN:
+            return self.geometry.size + 1 - distance
+        if result == LOSS:
+            return distance - self.geometry.size - 1
+        return 0
+
+    def _move_value(self, result, distance) -> MoveValue:
+        return MoveValue(RESULT_NAMES[result], distance, self.score(result, distance))
+
+    def _solve(self, mover, other):
+        """(position value, cell -> value of each move), cells in this orientation"""
+        moves = {}
+        if not _won(other, self.geometry):
+            free = self.geometry.full_mask & ~(mover | other)
+            while free:
+                low = free & -free
+                free ^= low
+                moves[low.bit_length()] = self._move_value(*_negate(self.value(other, mover | low)))
+        return self._move_value(*self.value(mover, other)), moves
+
+    def analyze(self, positions) -> list:
+        """An Analysis per position string (ValueError on a malformed one)"""
+        return self.analyze_parsed(positions, [parse_position(position, self.geometry)
+                                               for position in positions])
+
+    def analyze_parsed(self, positions, parsed) -> list:
+        """analyze for position strings already parsed by parse_position"""
+        solved = {}  # Canonical key -> (value, moves) in the canonical orientation
+        results = []
+        for position, (side, mover, other) in zip(positions, parsed):
+            key, symmetry = self.canonical(mover, other)
+            if key not in solved:
+                size = self.geometry.size
+                solved[key] = self._solve(key & self.geometry.full_mask, key >> size)
+            value, moves = solved[key]
+            # The position's cell c is the canonical cell permutation[c]
+            permutation = self.geometry.symmetries[symmetry]
+            own = {cell: moves[permutation[cell]] for cell in self.geometry.cells
+                   if permutation[cell] in moves}
+            results.append(Analysis(position.strip(), side, value, own))
+        return results
+
+
+def _negate(value):
+    """The value one ply earlier, for the other side"""
+    result, distance = value
+    return {WIN: LOSS, LOSS: WIN, DRAW: DRAW}[result], distance + 1 if result != DRAW else 0
+
+
+def _rank(value):
+    """Order of preference: fastest win, then draw, then slowest loss"""
+    result, distance = value
+    if result == WIN:
+        return 1000 - distance
+    if result == LOSS:
+        return distance - 1000
+    return 0
+
+
+_analyzers = {}
+
+
+def analyzer_for(geometry) -> Analyzer:
+    """The shared analyzer of a board size (its cache lives as long as the process)"""
+    size = (geometry.rows, geometry.cols, geometry.k)
+    analyzer = _analyzers.get(size)
+    if analyzer is None:
+        analyzer = _analyzers[size] = Analyzer(geometry)
+    return analyzer
+
+
+def analyze(positions, rows=3, cols=3, k=3) -> list:
+    return analyzer_for(get_geometry(rows, cols, k)).analyze(positions)
+
+
+def to_json(analysis) -> dict:
+    return {
+        "position": analysis.position,
+        "to_move": analysis.to_move,
+        **analysis.value._asdict(),
+        "moves": {str(cell): value._asdict() for cell, value in sorted(analysis.moves.items())},
+    }
+
+
+def _analyze_lines(lines, rows, cols, k):
+    """
+    Worker task: one JSON line per input line, errors included. The
+    well-formed lines are analysed as one batch.
+    """
+    analyzer = analyzer_for(get_geometry(rows, cols, k))
+    output = []
+    positions, parsed, indices = [], [], []
+    for line in lines:
+        try:
+            parsed.append(parse_position(line, analyzer.geometry))
+        except ValueError as error:
+            output.append(json.dumps({"position": line.strip(), "error": str(error)}))
+            continue
+        positions.append(line)
+        indices.append(len(output))
+        output.append(None)  # Filled in below
+    for index, analysis in zip(indices, analyzer.analyze_parsed(positions, parsed)):
+        output[index] = json.dumps(to_json(analysis))
+    return output
+
+
+def _chunks(lines, size):
+    """The non-blank lines of every size lines read (a chunk of blank lines is skipped, not the end)"""
+    lines = iter(lines)
+    while True:
+        raw = list(islice(lines, size))
+        if not raw:
+            return
+        kept = [line for line in raw if line.strip()]
+        if kept:
+            yield kept
+
+
+def analyze_stream(lines, rows=3, cols=3, k=3, workers=None, chunk=CHUNK_LINES):
+    """Yield the JSON line of every position line, in order, a chunk per task"""
+    chunks = _chunks(lines, chunk)
+    if workers is None or workers <= 1:
+        for lines_chunk in chunks:
+            yield from _analyze_lines(lines_chunk, rows, cols, k)
+        return
+    pool = get_pool(workers)
+    pending = deque()
+    try:
+        for lines_chunk in chunks:
+            pending.append(pool.submit(_analyze_lines, lines_chunk, rows, cols, k))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:  # The caller stopped early
+            future.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every legal move of many positions")
+    parser.add_argument("file", nargs="?", default=None, help="positions, one per line (default: stdin)")
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: analyse here)")
+    parser.add_argument("--chunk", type=int, default=CHUNK_LINES, help="positions per task")
+    args = parser.parse_args()
+
+    try:
+        get_geometry(args.rows, args.cols, args.k)
+        source = open(args.file) if args.file else sys.stdin
+    except (ValueError, OSError) as error:
+        raise SystemExit(f"error: {error}")
+    with source:
+        for line in analyze_stream(source, args.rows, args.cols, args.k, args.workers, args.chunk):
+            sys.stdout.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Round-robin tournament between machine players.
+
+Every concrete ``MachinePlayer`` subclass found in the given modules plays
+every other one, ``games`` times with each side moving first. Batches of
+games run in the shared process pool, and the finished batches are saved to
+a checkpoint file after each one, so an interrupted tournament resumes where
+it stopped.
+
+The report lists, per player, the score (wins plus half the draws) with a
+95% Wilson interval, an Elo rating with the interval it implies (open at
+one end for a 0% or 100% score), and the average think time per move,
+followed by the score of each pairing.
+
+With ``--shared-table`` the searches of every worker go through one
+transposition table in shared memory (see shared_table.py), and the report
+ends with its hit rate and the share of hits on entries another worker
+stored.
+
+Usage::
+
+    python arena.py [--games N] [--workers N] [--checkpoint PATH] [--module NAME ...] [--shared-table]
+"""
+
+import argparse
+import importlib
+import inspect
+import json
+import math
+import os
+import random
+import time
+from collections import deque
+from itertools import combinations
+from headless import HeadlessGame, play_game, X, O
+from instrumentation import Instrumentation
+from parallel_search import get_pool
+from player import MachinePlayer
+from shared_table import SharedTranspositionTable
+
+Z_95 = 1.96
+BASE_RATING = 1500
+
+
+def discover_players(module_names=("player", "mcts_player")) -> dict:
+    """Name -> class of every concrete MachinePlayer subclass defined in the modules"""
+    for name in module_names:
+        importlib.import_module(name)
+    found = {}
+    pending = list(MachinePlayer.__subclasses__())
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        if not inspect.isabstract(cls) and cls.__module__ in module_names:
+            found[cls.__name__] = cls
+    return dict(sorted(found.items()))
+
+
+class _ThinkTimer(Instrumentation):
+    def __init__(self):
+        self.seconds = 0.0
+        self.moves = 0
+
+    def on_move(self, player, seconds, stats=None):
+        self.seconds += seconds
+        self.moves += 1
+
+
+def _create_player(cls, symbol, table):
+    """cls(symbol), searching with table when the player takes a shared_table"""
+    if table is not None and "shared_table" in inspect.signature(cls).parameters:
+        return cls(symbol, shared_table=table)
+    return cls(symbol)
+
+
+def _play_batch(player_x, player_o, count, seed, options, table=None):
+    """
+    Worker task: play count games; returns the totals of the batch. With a
+    shared table, the players that take one search with it.
+    """
+    if seed is not None:
+        random.seed(seed)
+    timers = {X: _ThinkTimer(), O: _ThinkTimer()}
+    players = {X: _create_player(player_x, X, table), O: _create_player(player_o, O, table)}
+    for symbol, player in players.items():
+        player.instrumentation = timers[symbol]
+    game = HeadlessGame(**options)
+    wins = {X: 0, O: 0, None: 0}
+    if table is not None:
+        hits, misses, cross_hits = table.hits, table.misses, table.cross_hits
+    for _ in range(count):
+        game.reset()
+        wins[play_game(game, players)] += 1
+    totals = {
+        "x_wins": wins[X], "o_wins": wins[O], "draws": wins[None],
+        "x_seconds": timers[X].seconds, "x_moves": timers[X].moves,
+        "o_seconds": timers[O].seconds, "o_moves": timers[O].moves,
+    }
+    if table is not None:
+        totals.update(table_hits=table.hits - hits, table_misses=table.misses - misses,
+                      table_cross_hits=table.cross_hits - cross_hits)
+    return totals
+
+
+def wilson_interval(score, games, z=Z_95):
+    """Wilson score interval of a proportion (draws count as half a win)"""
+    if games == 0:
+        return 0.0, 1.0
+    p = score / games
+    denominator = 1 + z * z / games
+    center = (p + z * z / (2 * games)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def elo_difference(p, games):
+    """Rating difference that makes the expected score p (clamped off 0 and 1)"""
+    epsilon = 1 / (2 * games + 2)
+    p = min(1 - epsilon, max(epsilon, p))
+    return -400 * math.log10(1 / p - 1)
+
+
+class Tournament:
+    """Schedule, run and score a round robin, saving progress to checkpoint"""
+    def __init__(self, players, games=20, batch_size=10, seed=0, checkpoint=None, shared_table=None,
+                 **options):
+        self.players = players  # Name -> class
+        self.shared_table = shared_table  # Table every worker searches with, None for their own
+        self.games = games  # Per pairing and side
+        self.batch_size = batch_size
+        self.seed = seed
+        self.checkpoint = checkpoint
+        self.options = options  # For HeadlessGame (board size)
+        self.done = {}  # Task key -> batch totals
+        if checkpoint and os.path.exists(checkpoint):
+            self._load()
+
+    def _config(self):
+        return {"players": list(self.players), "games": self.games, "batch_size": self.batch_size,
+                "seed": self.seed, "options": self.options}
+
+    def _load(self):
+        with open(self.checkpoint) as f:
+            saved = json.load(f)
+        if saved["config"] != self._config():
+            raise ValueError(f"{self.checkpoint} belongs to a different tournament")
+        self.done = saved["done"]
+
+    def _save(self):
+        temporary = self.checkpoint + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump({"config": self._config(), "done": self.done}, f)
+        os.replace(temporary, self.checkpoint)
+
+    def tasks(self):
+        """(key, x name, o name, games) of every batch, both sides of every pairing"""
+        for first, second in combinations(self.players, 2):
+            for x_name, o_name in ((first, second), (second, first)):
+                for start in range(0, self.games, self.batch_size):
+                    count = min(self.batch_size, self.games - start)
+                    yield f"{x_name}|{o_name}|{start}", x_name, o_name, count
+
+    def run(self, workers=None, progress=None):
+        """Play the batches not in the checkpoint yet; progress(done, total) after each"""
+        workers = workers or os.cpu_count() or 1
+        remaining = [task for task in self.tasks() if task[0] not in self.done]
+        total = len(self.done) + len(remaining)
+        pool = get_pool(workers)
+        pending = deque()
+
+        def collect():
+            key, future = pending.popleft()
+            self.done[key] = future.result()
+            if self.checkpoint:
+                self._save()
+            if progress is not None:
+                progress(len(self.done), total)
+
+        for key, x_name, o_name, count in remaining:
+            seed = None if self.seed is None else f"{self.seed}:{key}"
+            pending.append((key, pool.submit(_play_batch, self.players[x_name], self.players[o_name],
+                                             count, seed, self.options, self.shared_table)))
+            if len(pending) >= 2 * workers:
+                collect()
+        while pending:
+            collect()
+
+    def table_stats(self) -> dict:
+        """Transposition table probes of the finished batches, summed over the workers"""
+        totals = {name: sum(batch.get(name, 0) for batch in self.done.values())
+                  for name in ("table_hits", "table_misses", "table_cross_hits")}
+        probes = totals["table_hits"] + totals["table_misses"]
+        totals["hit_rate"] = totals["table_hits"] / probes if probes else 0.0
+        totals["cross_hit_rate"] = totals["table_cross_hits"] / probes if probes else 0.0
+        return totals
+
+    def standings(self):
+        """Per-player and per-pairing results of the finished batches"""
+        players = {name: {"games": 0, "wins": 0, "draws": 0, "losses": 0,
+                          "seconds": 0.0, "moves": 0, "opponents": {}} for name in self.players}
+        pairings = {}
+        for key, totals in self.done.items():
+            x_name, o_name, _ = key.split("|")
+            games = totals["x_wins"] + totals["o_wins"] + totals["draws"]
+            for name, wins, losses, side, opponent in (
+                    (x_name, totals["x_wins"], totals["o_wins"], "x", o_name),
+                    (o_name, totals["o_wins"], totals["x_wins"], "o", x_name)):
+                record = players[name]
+                record["games"] += games
+                record["wins"] += wins
+                record["draws"] += totals["draws"]
+                record["losses"] += losses
+                record["seconds"] += totals[f"{side}_seconds"]
+                record["moves"] += totals[f"{side}_moves"]
+                record["opponents"][opponent] = record["opponents"].get(opponent, 0) + games
+                pairing = pairings.setdefault((name, opponent), [0.0, 0])
+                pairing[0] += wins + totals["draws"] / 2
+                pairing[1] += games
+
+        ratings = self._ratings(players)
+        for name, record in players.items():
+            games = record["games"]
+            score = record["wins"] + record["draws"] / 2
+            low, high = wilson_interval(score, games)
+            record.update({
+                "score": score / games if games else 0.0,
+                "score_interval": (low, high),
+                "elo": ratings[name],
+                "elo_interval": self._elo_interval(ratings[name], score, games, low, high),
+                "think_ms": 1000 * record["seconds"] / record["moves"] if record["moves"] else 0.0,
+            })
+            del record["opponents"]
+        return players, pairings
+
+    @staticmethod
+    def _elo_interval(elo, score, games, low, high):
+        """
+        The rating moves with the score: shift it to the score interval's
+        ends. A perfect (or zero) score only bounds the rating from below
+        (above), so that end of the interval is infinite.
+        """
+        if not games:
+            return elo, elo
+        difference = elo_difference(score / games, games)
+        return (-math.inf if score == 0 else elo + elo_difference(low, games) - difference,
+                math.inf if score == games else elo + elo_difference(high, games) - difference)
+
+    @staticmethod
+    def _ratings(players, iterations=1000, tolerance=0.01):
+        """
+        Performance ratings: each is its opponents' average plus its score's
+        difference. Every pass moves the ratings halfway to those values (a
+        full step just swaps two players' ratings back and forth) until no
+        rating changes by more than tolerance.
+        """
+        ratings = dict.fromkeys(players, float(BASE_RATING))
+        for _ in range(iterations):
+            updated = {}
+            for name, record in players.items():
+                games = record["games"]
+                if not games:
+                    updated[name] = BASE_RATING
+                    continue
+                score = (record["wins"] + record["draws"] / 2) / games
+                opponents = sum(ratings[o] * n for o, n in record["opponents"].items()) / games
+                updated[name] = opponents + elo_difference(score, games)
+            shift = BASE_RATING - sum(updated.values()) / len(updated)  # Keep the average fixed
+            updated = {name: (ratings[name] + rating + shift) / 2 for name, rating in updated.items()}
+            change = max(abs(updated[name] - ratings[name]) for name in ratings)
+            ratings = updated
+            if change < tolerance:
+                break
+        return ratings
+
+
+def format_report(players, pairings) -> str:
+    lines = [f"{'Player':<24} {'Games':>6} {'W-D-L':>13} {'Score [95% CI]':>22} "
+             f"{'Elo [95% CI]':>22} {'ms/move':>9}"]
+    for name, record in sorted(players.items(), key=lambda item: -item[1]["elo"]):
+        low, high = record["score_interval"]
+        elo_low, elo_high = record["elo_interval"]
+        wdl = f"{record['wins']}-{record['draws']}-{record['losses']}"
+        lines.append(f"{name:<24} {record['games']:>6} {wdl:>13} "
+                     f"{record['score']:>7.1%} [{low:.1%}, {high:.1%}] "
+                     f"{record['elo']:>6.0f} [{elo_low:.0f}, {elo_high:.0f}] "
+                     f"{record['think_ms']:>9.3f}")
+    lines.append("")
+    for (name, opponent), (score, games) in sorted(pairings.items()):
+        low, high = wilson_interval(score, games)
+        lines.append(f"{name} vs {opponent}: {score / games:.1%} [{low:.1%}, {high:.1%}] over {games}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Round-robin tournament between machine players")
+    parser.add_argument("--games", type=int, default=20, help="games per pairing and side")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint", metavar="PATH", default=None,
+                        help="save progress to PATH and resume from it")
+    parser.add_argument("--module", action="append", default=[],
+                        help="also import MachinePlayer subclasses from this module")
+    parser.add_argument("--players", nargs="*", help="only these players (default: all found)")
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--shared-table", action="store_true",
+                        help="search with one transposition table in shared memory across the workers")
+    args = parser.parse_args()
+
+    players = discover_players(["player", "mcts_player"] + args.module)
+    if args.players:
+        unknown = set(args.players) - set(players)
+        if unknown:
+            raise SystemExit(f"error: unknown players: {', '.join(sorted(unknown))}")
+        players = {name: players[name] for name in args.players}
+    if len(players) < 2:
+        raise SystemExit("error: a tournament needs at least two players")
+    try:
+        table = SharedTranspositionTable(1 << 20) if args.shared_table else None
+        tournament = Tournament(players, args.games, args.batch_size, args.seed, args.checkpoint,
+                                table, rows=args.rows, cols=args.cols, k=args.k)
+    except ValueError as error:
+        raise SystemExit(f"error: {error}")
+
+    started = time.perf_counter()
+    tournament.run(args.workers, lambda done, total: print(f"\r{done}/{total} batches", end="", flush=True))
+    print(f"\nPlayed in {time.perf_counter() - started:.1f}s\n")
+    print(format_report(*tournament.standings()))
+    if table is not None:
+        stats = tournament.table_stats()
+        print(f"\nShared table: {stats['table_hits'] + stats['table_misses']:,} probes, "
+              f"{stats['hit_rate']:.1%} hits, {stats['cross_hit_rate']:.1%} on entries of another worker")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+from functools import lru_cache
+
+import numpy as np
+
+from board_geometry import get_geometry
+
+
+@lru_cache(maxsize=None)
+def _line_indices(geometry):
+    """(lines, k) array of the 0-based cell indices of every winning line"""
+    return np.array(geometry.lines, dtype=np.intp) - 1
+
+
+class ArrayBoard:
+    """
+    Tic-Tac-Toe board backed by a NumPy int8 array. Requires NumPy.
+
+    Cell ``n`` is element ``n - 1``: 0 when empty, otherwise the code of its
+    symbol (codes are given out in order of first appearance). It exposes
+    the same public API as ``GameBoard``; queries are vectorised over the
+    whole board.
+    """
+    def __init__(self, rows=3, cols=3, k=3):
+        """Initialize an empty game board."""
+        self.geometry = get_geometry(rows, cols, k)
+        self._cells = np.zeros(self.geometry.size, dtype=np.int8)
+        self._symbols = [None]  # code -> symbol
+        self._codes = {}  # symbol -> code
+
+    def __getitem__(self, cell):
+        return self._symbols[self._cells[cell - 1]]
+
+    def __setitem__(self, cell, symbol):
+        if symbol is None:
+            self._cells[cell - 1] = 0
+            return
+        code = self._codes.get(symbol)
+        if code is None:
+            code = self._codes[symbol] = len(self._symbols)
+            self._symbols.append(symbol)
+        self._cells[cell - 1] = code
+
+    def make_move(self, cell, symbol):
+        """Place symbol on a free cell"""
+        self[cell] = symbol
+
+    def undo_move(self, cell):
+        """Take back the stone on cell"""
+        self[cell] = None
+
+    @property
+    def size(self) -> int:
+        return self.geometry.size
+
+    @property
+    def move_count(self) -> int:
+        return int(np.count_nonzero(self._cells))
+
+    def is_cell_taken(self, cell) -> bool:
+        return bool(self._cells[cell - 1])
+
+    def get_free_cells(self) -> list:
+        return (np.flatnonzero(self._cells == 0) + 1).tolist()
+
+    def count_free_cells(self) -> int:
+        return self.size - self.move_count
+
+    def is_first_move(self) -> bool:
+        return not self._cells.any()
+
+    def is_board_full(self) -> bool:
+        return bool(self._cells.all())
+
+    def check_winner(self):
+        """
+        Determine if there's a winner and return the winning symbol.
+
+        Returns:
+            Symbol or None: Winning player's symbol, or None if no winner
+        """
+        values = self._cells[_line_indices(self.geometry)]
+        won = (values[:, 0] != 0) & (values == values[:, :1]).all(axis=1)
+        if not won.any():
+            return None
+        return self._symbols[values[won.argmax(), 0]]
+
+    def __str__(self):
+        """Return a string representation of the current board state."""
+        def cell_display(cell):
+            symbol = self[cell]
+            return symbol if symbol is not None else cell
+        return self.geometry.render(cell_display)
@@ -0,0 +1,127 @@
+"""
+Vectorised random self-play for gathering statistics. Requires NumPy.
+
+N games are stored as an ``(N, cells)`` int8 array (0 empty, 1 first player,
+2 second player). Every ply picks a random legal move for all the unfinished
+games at once and detects wins for the whole batch by projecting each side's
+stones onto the win-line incidence matrix.
+
+Usage::
+
+    python batch_simulator.py [games] [--seed SEED] [--rows R --cols C --k K]
+"""
+
+import argparse
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from board_geometry import STANDARD, get_geometry
+
+EMPTY, FIRST, SECOND = 0, 1, 2
+DRAW = 3
+
+SimulationResult = namedtuple("SimulationResult", [
+    "games",
+    "wins",      # Games won by the player who moves first
+    "draws",
+    "losses",    # Games won by the other player
+    "length_histograms",  # Outcome ("win"/"draw"/"loss") -> games per number of moves
+])
+
+
+def line_matrix(geometry=STANDARD) -> np.ndarray:
+    """(cells, lines) incidence matrix: 1 where the cell belongs to the line"""
+    matrix = np.zeros((geometry.size, len(geometry.lines)), dtype=np.float32)
+    for index, line in enumerate(geometry.lines):
+        matrix[[cell - 1 for cell in line], index] = 1
+    return matrix
+
+
+def play_random(boards, rng, geometry=STANDARD, first_ply=0):
+    """
+    Finish every game in boards with uniformly random legal moves. The player
+    to move at first_ply is FIRST when first_ply is even. Returns (results,
+    lengths): the winner (FIRST/SECOND) or DRAW of each game and the total
+    number of moves it lasted.
+    """
+    games = boards.shape[0]
+    lines = line_matrix(geometry)
+    k = geometry.k
+    results = np.full(games, DRAW, dtype=np.int8)
+    lengths = np.full(games, geometry.size, dtype=np.int16)
+    active = np.arange(games)  # Index of each unfinished game in the result arrays
+    current = boards.copy()    # Boards of the unfinished games only
+    for ply in range(first_ply, geometry.size):
+        if active.size == 0:
+            break
+        player = FIRST if ply % 2 == 0 else SECOND
+        # A random key per cell, occupied cells pushed below any free one
+        keys = rng.random(current.shape, dtype=np.float32)
+        keys[current != EMPTY] = -1.0
+        current[np.arange(active.size), keys.argmax(axis=1)] = player
+        if ply + 1 < 2 * k - 1:
+            continue  # Nobody can have k in a row yet
+        line_counts = (current == player).astype(np.float32) @ lines
+        won = (line_counts >= k).any(axis=1)
+        finished = active[won]
+        results[finished] = player
+        lengths[finished] = ply + 1
+        active = active[~won]
+        current = current[~won]
+    return results, lengths
+
+
+def simulate(games, seed=None, geometry=STANDARD, start=None, chunk_size=1 << 16):
+    """
+    Play ``games`` random games and return a SimulationResult.
+
+    ``start`` optionally gives the initial board as a sequence of cells
+    (0/1/2 as above) with at least one empty cell; every game continues from
+    it. Games are played in chunks of chunk_size to bound memory.
+    """
+    rng = np.random.default_rng(seed)
+    if start is None:
+        start = np.zeros(geometry.size, dtype=np.int8)
+    start = np.asarray(start, dtype=np.int8)
+    first_ply = int(np.count_nonzero(start))
+    histograms = {outcome: np.zeros(geometry.size + 1, dtype=np.int64)
+                  for outcome in ("win", "draw", "loss")}
+    counts = {FIRST: 0, SECOND: 0, DRAW: 0}
+    remaining = games
+    while remaining > 0:
+        batch = min(chunk_size, remaining)
+        boards = np.tile(start, (batch, 1))
+        results, lengths = play_random(boards, rng, geometry, first_ply)
+        for code, outcome in ((FIRST, "win"), (DRAW, "draw"), (SECOND, "loss")):
+            mask = results == code
+            counts[code] += int(mask.sum())
+            histograms[outcome] += np.bincount(lengths[mask], minlength=geometry.size + 1)
+        remaining -= batch
+    return SimulationResult(games, counts[FIRST], counts[DRAW], counts[SECOND], histograms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate random Tic-Tac-Toe games")
+    parser.add_argument("games", type=int, nargs="?", default=1_000_000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    geometry = get_geometry(args.rows, args.cols, args.k)
+    started = time.perf_counter()
+    result = simulate(args.games, args.seed, geometry)
+    elapsed = time.perf_counter() - started
+
+    print(f"{result.games} games in {elapsed:.2f}s ({result.games / elapsed * 60:,.0f} games/min)")
+    print(f"First player wins: {result.wins}  Draws: {result.draws}  Losses: {result.losses}")
+    for outcome, histogram in result.length_histograms.items():
+        lengths = {moves: int(games) for moves, games in enumerate(histogram) if games}
+        print(f"  {outcome} lengths: {lengths}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+from board_geometry import get_geometry
+
+
+class BitBoard:
+    """
+    Tic-Tac-Toe board backed by one integer bitmask per symbol.
+
+    Cell ``n`` is stored in bit ``n - 1``. It exposes the same public API as
+    ``GameBoard`` so both can be used interchangeably. Like GameBoard it
+    counts the lines each symbol completes, updated from the lines through
+    the cell of every assignment, so the winner query takes constant time
+    whatever order the cells were filled or emptied in.
+    """
+    def __init__(self, rows=3, cols=3, k=3):
+        """Initialize an empty game board."""
+        self.geometry = get_geometry(rows, cols, k)
+        self._bits = {}  # symbol -> bitmask of the cells it occupies
+        self._completed = {}  # symbol -> lines it fills completely
+
+    def __getitem__(self, cell):
+        bit = 1 << (cell - 1)
+        for symbol, bits in self._bits.items():
+            if bits & bit:
+                return symbol
+        return None
+
+    def __setitem__(self, cell, symbol):
+        bit = 1 << (cell - 1)
+        masks = self.geometry.masks_through[cell]
+        for other, bits in self._bits.items():
+            if bits & bit:
+                self._completed[other] -= sum(bits & mask == mask for mask in masks)
+                self._bits[other] = bits & ~bit
+        if symbol is not None:
+            bits = self._bits[symbol] = self._bits.get(symbol, 0) | bit
+            self._completed[symbol] = (self._completed.get(symbol, 0)
+                                       + sum(bits & mask == mask for mask in masks))
+
+    def make_move(self, cell, symbol):
+        """Place symbol on a free cell"""
+        self[cell] = symbol
+
+    def undo_move(self, cell):
+        """Take back the stone on cell"""
+        self[cell] = None
+
+    @property
+    def size(self) -> int:
+        return self.geometry.size
+
+    @property
+    def move_count(self) -> int:
+        return self._occupied().bit_count()
+
+    def _occupied(self) -> int:
+        occupied = 0
+        for bits in self._bits.values():
+            occupied |= bits
+        return occupied
+
+    def is_cell_taken(self, cell) -> bool:
+        return bool(self._occupied() & (1 << (cell - 1)))
+
+    def get_free_cells(self) -> list:
+        free = self.geometry.full_mask & ~self._occupied()
+        cells = []
+        while free:
+            lowest = free & -free
+            cells.append(lowest.bit_length())
+            free ^= lowest
+        return cells
+
+    def count_free_cells(self) -> int:
+        return (self.geometry.full_mask & ~self._occupied()).bit_count()
+
+    def is_first_move(self) -> bool:
+        return self._occupied() == 0
+
+    def is_board_full(self) -> bool:
+        return self._occupied() == self.geometry.full_mask
+
+    def check_winner(self):
+        """
+        Determine if there's a winner and return the winning symbol.
+
+        Returns:
+            Symbol or None: Winning player's symbol, or None if no winner
+        """
+        for symbol, completed in self._completed.items():
+            if completed:
+                return symbol
+        return None
+
+    def __str__(self):
+        """Return a string representation of the current board state."""
+        def cell_display(cell):
+            symbol = self[cell]
+            return symbol if symbol is not None else cell
+        return self.geometry.render(cell_display)
@@ -0,0 +1,80 @@
+"""
+Board protocol and the registry of board backends.
+
+Every player and engine works with any object following ``Board``: cells
+are numbered from 1 and hold a symbol or None, and the rules queries
+(winner, full board, free cells) live on the board. Backends are looked up
+by name; ``register_backend`` adds new ones, as a function or a class
+decorator. Backends needing optional packages (NumPy) are registered with a
+loader, so the package is only imported when that backend is used.
+"""
+
+from typing import Protocol, runtime_checkable
+from board_geometry import BoardGeometry
+from game_board import GameBoard
+from bit_board import BitBoard
+from list_board import ListBoard
+
+
+@runtime_checkable
+class Board(Protocol):
+    """What players, engines and games expect from a board"""
+    geometry: BoardGeometry
+
+    def __getitem__(self, cell): ...
+    def __setitem__(self, cell, symbol): ...
+    def make_move(self, cell, symbol): ...
+    def undo_move(self, cell): ...
+    @property
+    def size(self) -> int: ...
+    @property
+    def move_count(self) -> int: ...
+    def is_cell_taken(self, cell) -> bool: ...
+    def get_free_cells(self) -> list: ...
+    def count_free_cells(self) -> int: ...
+    def is_first_move(self) -> bool: ...
+    def is_board_full(self) -> bool: ...
+    def check_winner(self): ...
+
+
+# Available board implementations, selectable by name: name -> callable(rows, cols, k)
+BOARD_BACKENDS = {}
+DEFAULT_BACKEND = "dict"
+
+
+def register_backend(name, factory=None):
+    """
+    Register factory (a board class or any callable taking rows, cols, k)
+    under name. Without factory it returns a class decorator.
+    """
+    if factory is None:
+        def decorator(board_class):
+            register_backend(name, board_class)
+            return board_class
+        return decorator
+    BOARD_BACKENDS[name] = factory
+    return factory
+
+
+def _numpy_board(rows=3, cols=3, k=3):
+    from array_board import ArrayBoard  # Imports NumPy
+    return ArrayBoard(rows, cols, k)
+
+
+register_backend("dict", GameBoard)
+register_backend("bitboard", BitBoard)
+register_backend("list", ListBoard)
+register_backend("numpy", _numpy_board)
+
+
+def create_board(backend=DEFAULT_BACKEND, rows=3, cols=3, k=3):
+    """Create an empty rows x cols board (k in a row wins) using the named backend"""
+    try:
+        factory = BOARD_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown board backend: {backend!r} "
+                         f"(choose from {', '.join(BOARD_BACKENDS)})") from None
+    try:
+        return factory(rows, cols, k)
+    except ImportError as error:
+        raise ValueError(f"The {backend!r} board backend is not available: {error}") from None
@@ -0,0 +1,147 @@
+"""
+Conformance checks shared by every board backend.
+
+``check_backend`` replays random games on a backend next to the reference
+``GameBoard`` (dict backend) and compares every query after every move and
+take-back. It also fills boards by assignment in any order, past a win,
+and empties them out of order. Then it lets the machine players and the
+search engine play on it.
+Run it after adding a backend::
+
+    python board_conformance.py [BACKEND ...]   # Default: every registered backend
+"""
+
+import argparse
+import random
+from board_backends import Board, BOARD_BACKENDS, create_board
+from game_board import GameBoard
+from headless import HeadlessGame, play_game, PLAYING, X, O
+from player import RandomMachinePlayer, MinimaxMachinePlayer
+from search import AlphaBetaEngine
+from mcts_player import MCTSMachinePlayer
+from transposition_table import TranspositionTable
+
+SIZES = ((3, 3, 3), (4, 4, 3), (3, 5, 4), (5, 5, 4))
+
+
+class ConformanceError(AssertionError):
+    """A backend answered differently from the reference board"""
+
+
+def _compare(board, reference, context):
+    for name, query in (("move_count", lambda b: b.move_count),
+                        ("get_free_cells", lambda b: sorted(b.get_free_cells())),
+                        ("count_free_cells", lambda b: b.count_free_cells()),
+                        ("is_first_move", lambda b: b.is_first_move()),
+                        ("is_board_full", lambda b: b.is_board_full()),
+                        ("check_winner", lambda b: b.check_winner()),
+                        ("cells", lambda b: [b[cell] for cell in b.geometry.cells]),
+                        ("taken", lambda b: [b.is_cell_taken(cell) for cell in b.geometry.cells]),
+                        ("str", str)):
+        got, expected = query(board), query(reference)
+        if got != expected:
+            raise ConformanceError(f"{context}: {name} is {got!r}, expected {expected!r}")
+
+
+def _check_rules(backend, rng, games):
+    for rows, cols, k in SIZES:
+        for game in range(games):
+            board, reference = create_board(backend, rows, cols, k), GameBoard(rows, cols, k)
+            if not isinstance(board, Board):
+                raise ConformanceError(f"{type(board).__name__} does not follow the Board protocol")
+            if board.size != rows * cols or board.geometry is not reference.geometry:
+                raise ConformanceError(f"{rows}x{cols}: wrong size or geometry")
+            context = f"{rows}x{cols} k={k} game {game}"
+            _compare(board, reference, context)
+            free = reference.get_free_cells()
+            rng.shuffle(free)
+            moves, symbol = [], X
+            for cell in free:
+                board.make_move(cell, symbol)
+                reference.make_move(cell, symbol)
+                moves.append(cell)
+                _compare(board, reference, f"{context} after {cell}")
+                if reference.check_winner() is not None:
+                    break
+                symbol = symbol.opponent
+            for cell in reversed(moves[rng.randrange(len(moves)):]):
+                board.undo_move(cell)
+                reference.undo_move(cell)
+                _compare(board, reference, f"{context} after taking back {cell}")
+
+
+def _check_assignments(backend, rng, games):
+    """Boards that go on after a line is completed, emptied in random order"""
+    for rows, cols, k in SIZES:
+        for game in range(games):
+            board, reference = create_board(backend, rows, cols, k), GameBoard(rows, cols, k)
+            context = f"{rows}x{cols} k={k} assignment {game}"
+            line = rng.choice(reference.geometry.lines)
+            for cell in line:
+                board[cell] = X
+                reference[cell] = X
+                _compare(board, reference, f"{context} after X on {cell}")
+            free = reference.get_free_cells()
+            rng.shuffle(free)
+            for cell in free:
+                reference[cell] = O
+                if any(all(reference[other] == O for other in through)
+                       for through in reference.geometry.lines_through[cell]):
+                    reference[cell] = None  # Only X may have a line, so the winner is clear
+                    continue
+                board[cell] = O
+                _compare(board, reference, f"{context} after O on {cell}")
+            taken = [cell for cell in reference.geometry.cells if reference.is_cell_taken(cell)]
+            rng.shuffle(taken)
+            for cell in taken:
+                board[cell] = None
+                reference[cell] = None
+                _compare(board, reference, f"{context} after emptying {cell}")
+
+
+def _check_players(backend, seed):
+    random.seed(seed)
+    game = HeadlessGame(backend)
+    players = {X: MinimaxMachinePlayer(X, use_perfect_play=False,
+                                       engine=AlphaBetaEngine(TranspositionTable())),
+               O: MinimaxMachinePlayer(O, use_perfect_play=False, engine=None,
+                                       table=TranspositionTable())}
+    if play_game(game, players) is not None:
+        raise ConformanceError("perfect players did not draw")
+    for opponent in (MinimaxMachinePlayer(O), MCTSMachinePlayer(O, playouts=300, seed=seed)):
+        game.reset()
+        if play_game(game, {X: RandomMachinePlayer(X), O: opponent}) == X:
+            raise ConformanceError(f"{type(opponent).__name__} lost to a random player")
+    game = HeadlessGame(backend, 4, 4, 3)
+    play_game(game, {X: MinimaxMachinePlayer(X, time_budget=0.02), O: RandomMachinePlayer(O)})
+    if game.status() == PLAYING:
+        raise ConformanceError("4x4 game did not finish")
+
+
+def check_backend(backend, games=20, seed=0):
+    """Raise ConformanceError unless the named backend behaves like the reference board"""
+    _check_rules(backend, random.Random(seed), games)
+    _check_assignments(backend, random.Random(seed), games)
+    _check_players(backend, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check board backends against the reference board")
+    parser.add_argument("backends", nargs="*", help="backends to check (default: all registered)")
+    parser.add_argument("--games", type=int, default=20, help="random games per board size")
+    args = parser.parse_args()
+
+    failed = False
+    for backend in args.backends or list(BOARD_BACKENDS):
+        try:
+            check_backend(backend, args.games)
+        except (ConformanceError, ValueError) as error:
+            failed = True
+            print(f"{backend}: FAILED: {error}")
+        else:
+            print(f"{backend}: ok")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
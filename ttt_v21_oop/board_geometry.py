@@ -0,0 +1,130 @@
+from functools import lru_cache
+
+
+class BoardGeometry:
+    """
+    Precomputed tables of an m x n board where k in a row wins.
+
+    Cells are numbered 1..rows*cols row by row, and cell ``n`` is bit
+    ``n - 1`` of a bitboard. Instances are shared: use ``get_geometry``.
+    """
+    def __init__(self, rows, cols, k):
+        if rows < 1 or cols < 1:
+            raise ValueError("The board needs at least one row and one column")
+        if not 1 <= k <= max(rows, cols):
+            raise ValueError(f"Cannot make {k} in a row on a {rows}x{cols} board")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.size = rows * cols
+        self.cells = tuple(range(1, self.size + 1))
+        self.full_mask = (1 << self.size) - 1
+        self.lines = self._winning_lines()
+        self.line_masks = tuple(sum(1 << (cell - 1) for cell in line) for line in self.lines)
+        # Lines through each cell (index 0 unused): a move can only complete one of these
+        self.lines_through = tuple(
+            tuple(line for line in self.lines if cell in line) if cell else ()
+            for cell in range(self.size + 1)
+        )
+        self.line_indices_through = tuple(
+            tuple(index for index, line in enumerate(self.lines) if cell in line) if cell else ()
+            for cell in range(self.size + 1)
+        )
+        self.masks_through = tuple(
+            tuple(sum(1 << (c - 1) for c in line) for line in lines)
+            for lines in self.lines_through
+        )
+        self.symmetries = self._symmetry_permutations()
+        self.inverse_symmetries = tuple(
+            tuple(permutation.index(cell) if cell else 0 for cell in range(self.size + 1))
+            for permutation in self.symmetries
+        )
+        # Cells on more lines first (center, corners, edges on 3x3), then nearer the center
+        self.static_order = tuple(sorted(
+            self.cells,
+            key=lambda cell: (-len(self.lines_through[cell]), self._distance_to_center(cell))
+        ))
+        self.center = self.static_order[0]
+
+    def __repr__(self):
+        return f"BoardGeometry(rows={self.rows}, cols={self.cols}, k={self.k})"
+
+    @property
+    def is_standard(self) -> bool:
+        """Whether this is the classic 3x3 board with 3 in a row"""
+        return (self.rows, self.cols, self.k) == (3, 3, 3)
+
+    def cell(self, row, col) -> int:
+        return row * self.cols + col + 1
+
+    def row_col(self, cell):
+        return divmod(cell - 1, self.cols)
+
+    def _distance_to_center(self, cell):
+        row, col = self.row_col(cell)
+        return abs(2 * row - (self.rows - 1)) + abs(2 * col - (self.cols - 1))
+
+    def _winning_lines(self):
+        lines = []
+        for row in range(self.rows):
+            for col in range(self.cols):
+                for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_row = row + d_row * (self.k - 1)
+                    end_col = col + d_col * (self.k - 1)
+                    if 0 <= end_row < self.rows and 0 <= end_col < self.cols:
+                        lines.append(tuple(self.cell(row + d_row * i, col + d_col * i)
+                                           for i in range(self.k)))
+        if self.k == 1:  # Every direction yields the same single cell
+            lines = list(dict.fromkeys(lines))
+        return tuple(lines)
+
+    def _symmetry_permutations(self):
+        """
+        Rotations/reflections that map the board onto itself: the 8 of the D4
+        group on square boards, 4 on rectangular ones.
+
+        Each permutation maps a cell to the cell it lands on after the
+        transformation; index 0 is unused so cells can be used directly.
+        """
+        last_row, last_col = self.rows - 1, self.cols - 1
+        transforms = [
+            lambda r, c: (r, c),                        # Identity
+            lambda r, c: (last_row - r, last_col - c),  # Rotate 180
+            lambda r, c: (r, last_col - c),             # Mirror horizontally
+            lambda r, c: (last_row - r, c),             # Mirror vertically
+        ]
+        if self.rows == self.cols:
+            transforms += [
+                lambda r, c: (c, last_row - r),             # Rotate 90
+                lambda r, c: (last_col - c, r),             # Rotate 270
+                lambda r, c: (c, r),                        # Main diagonal
+                lambda r, c: (last_col - c, last_row - r),  # Anti-diagonal
+            ]
+        permutations = []
+        for transform in transforms:
+            permutation = [0] * (self.size + 1)
+            for cell in self.cells:
+                permutation[cell] = self.cell(*transform(*self.row_col(cell)))
+            permutations.append(tuple(permutation))
+        return tuple(permutations)
+
+    def render(self, cell_display) -> str:
+        """Draw the board, showing cell_display(cell) inside each cell"""
+        width = max(7, len(str(self.size)) + 6)
+        separator = "+" + "+".join("-" * width for _ in range(self.cols)) + "+"
+        padding = "|" + "|".join(" " * width for _ in range(self.cols)) + "|"
+        rows = [separator]
+        for row in range(self.rows):
+            values = "|".join(str(cell_display(self.cell(row, col))).center(width)
+                              for col in range(self.cols))
+            rows += [padding, "|" + values + "|", padding, separator]
+        return "\n".join(rows)
+
+
+@lru_cache(maxsize=None)
+def get_geometry(rows=3, cols=3, k=3) -> BoardGeometry:
+    """Return the (shared) precomputed geometry of an m x n, k board"""
+    return BoardGeometry(rows, cols, k)
+
+
+STANDARD = get_geometry(3, 3, 3)
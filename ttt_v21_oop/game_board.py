@@ -1,62 +1,100 @@
+from board_geometry import get_geometry
+
+
 class GameBoard:
     """
     Manages the state and rules of the Tic-Tac-Toe board.
+
+    The board has ``rows`` x ``cols`` cells numbered from 1, and ``k`` symbols
+    in a row (horizontally, vertically or diagonally) win.
+
+    Besides the cells it keeps, per symbol, how many stones each line holds,
+    the number of lines already completed, the set of free cells and the
+    move count. They are updated on every assignment, so the winner, full and
+    first-move queries take constant time.
     """
-    def __init__(self):
+    def __init__(self, rows=3, cols=3, k=3):
         """Initialize an empty game board."""
-        self._board = {i: None for i in range(1, 10)}
-        self._WINNING_COMBINATIONS = [
-            (1, 2, 3), (4, 5, 6), (7, 8, 9),  # Rows
-            (1, 4, 7), (2, 5, 8), (3, 6, 9),  # Columns
-            (1, 5, 9), (3, 5, 7)              # Diagonals
-        ]
-        
+        self.geometry = get_geometry(rows, cols, k)
+        self._board = {i: None for i in self.geometry.cells}
+        self._free = set(self.geometry.cells)
+        self._moves = 0
+        self._line_counts = {}  # symbol -> stones it has on each line (by line index)
+        self._completed = {}    # symbol -> lines it fills completely
+
     def __getitem__(self, cell) -> str:
         return self._board[cell]
-    
+
     def __setitem__(self, cell, symbol):
+        previous = self._board[cell]
+        if previous is not None:
+            self._update_lines(cell, previous, -1)
         self._board[cell] = symbol
+        if symbol is not None:
+            self._update_lines(cell, symbol, 1)
+            self._free.discard(cell)
+        else:
+            self._free.add(cell)
+        self._moves = self.size - len(self._free)
+
+    def _update_lines(self, cell, symbol, delta):
+        counts = self._line_counts.get(symbol)
+        if counts is None:
+            counts = self._line_counts[symbol] = [0] * len(self.geometry.lines)
+            self._completed[symbol] = 0
+        k = self.geometry.k
+        for index in self.geometry.line_indices_through[cell]:
+            if delta < 0 and counts[index] == k:
+                self._completed[symbol] -= 1
+            counts[index] += delta
+            if delta > 0 and counts[index] == k:
+                self._completed[symbol] += 1
+
+    def make_move(self, cell, symbol):
+        """Place symbol on a free cell"""
+        self[cell] = symbol
+
+    def undo_move(self, cell):
+        """Take back the stone on cell"""
+        self[cell] = None
+
+    @property
+    def size(self) -> int:
+        return self.geometry.size
+
+    @property
+    def move_count(self) -> int:
+        return self._moves
 
     def is_cell_taken(self, cell) -> bool:
         return self[cell] is not None
 
     def get_free_cells(self) -> list:
-        return [i for i in range(1, 10) if not self.is_cell_taken(i)]
+        return [i for i in self.geometry.cells if i in self._free]
+
+    def count_free_cells(self) -> int:
+        return len(self._free)
 
     def is_first_move(self) -> bool:
-        return len(self.get_free_cells()) == 9
+        return self._moves == 0
 
     def is_board_full(self) -> bool:
-        return len(self.get_free_cells()) == 0
+        return not self._free
 
     def check_winner(self):
         """
         Determine if there's a winner and return the winning symbol.
-        
+
         Returns:
             str or None: Winning player's symbol, or None if no winner
         """
-        for combination in self._WINNING_COMBINATIONS:
-            if all(self._board[cell] == self._board[combination[0]] != None 
-                   for cell in combination):
-                return self._board[combination[0]]
+        for symbol, completed in self._completed.items():
+            if completed:
+                return symbol
         return None
 
     def __str__(self):
         """Return a string representation of the current board state."""
         def cell_display(cell):
             return self._board[cell] if self.is_cell_taken(cell) else cell
-        board_str = "+-------+-------+-------+\n"
-        board_str += "|       |       |       |\n"
-        board_str += f"|   {cell_display(1)}   |   {cell_display(2)}   |   {cell_display(3)}   |\n"
-        board_str += "|       |       |       |\n"
-        board_str += "+-------+-------+-------+\n"
-        board_str += "|       |       |       |\n"
-        board_str += f"|   {cell_display(4)}   |   {cell_display(5)}   |   {cell_display(6)}   |\n"
-        board_str += "|       |       |       |\n"
-        board_str += "+-------+-------+-------+\n"
-        board_str += "|       |       |       |\n"
-        board_str += f"|   {cell_display(7)}   |   {cell_display(8)}   |   {cell_display(9)}   |\n"
-        board_str += "|       |       |       |\n"
-        board_str += "+-------+-------+-------+"
-        return board_str
\ No newline at end of file
+        return self.geometry.render(cell_display)
@@ -1,8 +1,15 @@
 class GameMessages:
-    ENTER_MOVE = "Enter your move (1-9): "
-    INVALID_NUMBER = "You must enter a number between 1 and 9."
+    ENTER_MOVE = "Enter your move (1-{last}): "
+    INVALID_NUMBER = "You must enter a number between 1 and {last}."
     CELL_TAKEN = "That cell is already taken."
+    GAME_OVER = "The game is already over."
     INVALID_INPUT = "Invalid input. Please enter a number."
+
+    ULTIMATE_ENTER_MOVE = "Enter sub-board and cell (1-9 each, e.g. 5 1): "
+    ULTIMATE_ENTER_CELL = "Enter your cell in sub-board {sub} (1-9): "
+    ULTIMATE_NOT_ALLOWED = "That move is not allowed."
+    ULTIMATE_NEXT_SUB = "Next move in sub-board {sub}."
+    ULTIMATE_ANY_SUB = "Next move in any open sub-board."
     
     HUMAN_WIN = "Congratulations! You won!"
     MACHINE_WIN = "I won! Better luck next time."
@@ -15,6 +22,15 @@ class GameMessages:
         "Choose 1/(2): "
     )
     
+    LEVEL_PROMPT = (
+        "Select difficulty level:\n"
+        "1. Easy (Random moves)\n"
+        "2. Medium (Looks two moves ahead)\n"
+        "3. Hard (Thinks up to 0.1 seconds)\n"
+        "4. Expert (Minimax algorithm)\n"
+        "Choose 1-4 (4): "
+    )
+    
     FIRST_PLAYER_PROMPT = (
         "Who wants to start?\n"
         "1. Human\n"
@@ -0,0 +1,224 @@
+"""
+Compact archive of finished 3x3 games.
+
+Every game takes 5 bytes (little endian)::
+
+    bits  0-35  the moves, one 4-bit cell number (1-9) each, 0 after the last
+    bits 36-37  result: DRAW, X_WON, O_WON or UNFINISHED
+    bit  38     set when O moved first
+    bit  39     unused
+
+The file starts with a small header (magic, version, record size) followed by
+the records, so it can be appended to and memory-mapped. ``GameArchive``
+scans it with generators, a chunk at a time, so the size of the archive does
+not matter; the query functions take any iterable of records.
+
+Usage::
+
+    python game_record.py ARCHIVE   # Print the aggregate queries
+"""
+
+import argparse
+import mmap
+import os
+import struct
+from collections import Counter, namedtuple
+from symbol import Symbol
+
+MAGIC = b"TTTG"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHH")  # magic, version, record size
+RECORD_SIZE = 5
+_UNPACK = struct.Struct("<IB")  # A record as its low 32 bits and its top byte
+MAX_MOVES = 9
+CHUNK_RECORDS = 1 << 16  # Records decoded per step while scanning
+
+DRAW, X_WON, O_WON, UNFINISHED = 0, 1, 2, 3
+_RESULT_SHIFT = 36
+_O_FIRST_BIT = 1 << 38
+
+GameRecord = namedtuple("GameRecord", ["moves", "result", "first"])  # first: Symbol
+
+
+class ArchiveError(Exception):
+    """The file is not a game archive this version can read"""
+
+
+def encode(moves, result, first=Symbol.AI) -> int:
+    """Pack a game into its 40-bit record"""
+    if len(moves) > MAX_MOVES:
+        raise ValueError(f"A game has at most {MAX_MOVES} moves")
+    value = 0
+    for index, cell in enumerate(moves):
+        if not 1 <= cell <= MAX_MOVES:
+            raise ValueError(f"Invalid cell: {cell}")
+        value |= cell << (4 * index)
+    value |= result << _RESULT_SHIFT
+    if first == Symbol.HUMAN:
+        value |= _O_FIRST_BIT
+    return value
+
+
+def decode(value) -> GameRecord:
+    moves = []
+    for index in range(MAX_MOVES):
+        cell = value >> (4 * index) & 0xF
+        if not cell:
+            break
+        moves.append(cell)
+    result = value >> _RESULT_SHIFT & 0x3
+    return GameRecord(tuple(moves), result, Symbol.HUMAN if value & _O_FIRST_BIT else Symbol.AI)
+
+
+def result_of(winner) -> int:
+    """Result code of a winner (a Symbol, or None for a draw)"""
+    if winner is None:
+        return DRAW
+    return X_WON if winner == Symbol.AI else O_WON
+
+
+class GameWriter:
+    """Append records to an archive, creating it (with its header) if needed"""
+    def __init__(self, path):
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD_SIZE))
+        else:
+            _check_header(path)
+        self.written = 0
+
+    def write(self, moves, result, first=Symbol.AI):
+        self._file.write(encode(moves, result, first).to_bytes(RECORD_SIZE, "little"))
+        self.written += 1
+
+    def write_game(self, game_result, first=Symbol.AI):
+        """Append a GameResult of headless.play_many"""
+        self.write(game_result.moves, result_of(game_result.winner), first)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _check_header(path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) != HEADER.size or HEADER.unpack(header) != (MAGIC, FORMAT_VERSION, RECORD_SIZE):
+        raise ArchiveError(f"{path} is not a version {FORMAT_VERSION} game archive")
+
+
+class GameArchive:
+    """Read-only, memory-mapped view of an archive"""
+    def __init__(self, path):
+        _check_header(path)
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # A record cut short by an interrupted write is ignored
+        self._count = (size - HEADER.size) // RECORD_SIZE
+
+    def __len__(self):
+        return self._count
+
+    def values(self):
+        """Yield the raw 40-bit record of every game"""
+        view = memoryview(self._map)
+        end = HEADER.size + self._count * RECORD_SIZE
+        try:
+            for start in range(HEADER.size, end, CHUNK_RECORDS * RECORD_SIZE):
+                chunk = view[start:min(end, start + CHUNK_RECORDS * RECORD_SIZE)]
+                for low, high in _UNPACK.iter_unpack(chunk):
+                    yield low | high << 32
+                chunk.release()
+        finally:
+            view.release()
+
+    def __iter__(self):
+        """Yield a GameRecord per game"""
+        for value in self.values():
+            yield decode(value)
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# ------------------------------ Queries ------------------------------
+
+def results_by_opening(records) -> dict:
+    """Opening cell -> Counter of results ("first_won", "draw", "second_won", "unfinished")"""
+    names = {DRAW: "draw", UNFINISHED: "unfinished"}
+    table = {}
+    for record in records:
+        if not record.moves:
+            continue
+        if record.result in (X_WON, O_WON):
+            winner = Symbol.AI if record.result == X_WON else Symbol.HUMAN
+            name = "first_won" if winner == record.first else "second_won"
+        else:
+            name = names[record.result]
+        table.setdefault(record.moves[0], Counter())[name] += 1
+    return dict(sorted(table.items()))
+
+
+def average_length(records) -> float:
+    games = moves = 0
+    for record in records:
+        games += 1
+        moves += len(record.moves)
+    return moves / games if games else 0.0
+
+
+def common_losing_lines(records, loser="first", plies=None, top=10):
+    """
+    The move sequences most often played in games that ``loser`` ("first"
+    or "second" to move) lost, cut to their first ``plies`` moves if given.
+    Returns (moves, games) pairs, most common first.
+    """
+    counts = Counter()
+    for record in records:
+        if record.result not in (X_WON, O_WON):
+            continue
+        first_won = (record.result == X_WON) == (record.first == Symbol.AI)
+        if first_won == (loser == "first"):
+            continue
+        counts[record.moves if plies is None else record.moves[:plies]] += 1
+    return counts.most_common(top)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise a game archive")
+    parser.add_argument("archive")
+    parser.add_argument("--plies", type=int, default=None, help="cut losing lines to this length")
+    args = parser.parse_args()
+
+    try:
+        archive = GameArchive(args.archive)
+    except (OSError, ArchiveError) as error:
+        raise SystemExit(f"error: {error}")
+    with archive:
+        print(f"{len(archive)} games, {average_length(archive):.2f} moves on average")
+        print("Results by opening move:")
+        for cell, results in results_by_opening(archive).items():
+            total = sum(results.values())
+            shares = "  ".join(f"{name} {count / total:.1%}" for name, count in sorted(results.items()))
+            print(f"  {cell}: {total} games  {shares}")
+        for loser in ("first", "second"):
+            print(f"Most common lines lost by the {loser} player:")
+            for moves, games in common_losing_lines(archive, loser, args.plies):
+                print(f"  {'-'.join(map(str, moves))}: {games}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Headless games: the rules of TicTacToeGame without prompts or printing, and
+a runner that plays many games between two machine players.
+
+``HeadlessGame`` is driven one move at a time::
+
+    game = HeadlessGame()
+    while game.status() == PLAYING:
+        game.apply(choice(game.legal_moves()))
+
+``play_many`` plays n games, optionally spread over worker processes, and
+yields a GameResult per game as the batches finish, so nothing accumulates
+in memory. Players are given as classes (or other picklable callables)
+taking the symbol they play.
+
+Usage::
+
+    python headless.py [games] [--x minimax] [--o random] [--workers N] [--seed S]
+                       [--record ARCHIVE]
+"""
+
+import argparse
+import random
+import time
+from collections import deque, namedtuple
+from board_backends import BOARD_BACKENDS, create_board, DEFAULT_BACKEND
+from game_messages import GameMessages
+from game_record import GameWriter
+from mcts_player import MCTSMachinePlayer
+from parallel_search import get_pool
+from player import RandomMachinePlayer, MinimaxMachinePlayer
+from symbol import Symbol
+
+PLAYING, WON, DRAW = "playing", "won", "draw"
+X, O = Symbol.AI, Symbol.HUMAN  # X plays Symbol.AI's stones and O Symbol.HUMAN's
+
+GameResult = namedtuple("GameResult", ["index", "winner", "moves"])  # winner: Symbol or None
+
+
+class HeadlessGame:
+    """Board, turn and result of one game, with no I/O"""
+    def __init__(self, board_backend=DEFAULT_BACKEND, rows=3, cols=3, k=3, first=X):
+        self.board = create_board(board_backend, rows, cols, k)
+        self.first = first
+        self.history = []  # Cells played, in order
+
+    def reset(self):
+        """Empty the board for a new game"""
+        while self.history:
+            self.board.undo_move(self.history.pop())
+
+    @property
+    def to_move(self):
+        return self.first if len(self.history) % 2 == 0 else self.first.opponent
+
+    @property
+    def winner(self):
+        return self.board.check_winner()
+
+    def status(self) -> str:
+        if self.board.check_winner() is not None:
+            return WON
+        if self.board.is_board_full():
+            return DRAW
+        return PLAYING
+
+    def legal_moves(self) -> list:
+        return self.board.get_free_cells() if self.status() == PLAYING else []
+
+    def apply(self, move) -> str:
+        """Play move for the side to move and return the new status"""
+        if self.status() != PLAYING:
+            raise ValueError(GameMessages.GAME_OVER)
+        if not isinstance(move, int) or not 1 <= move <= self.board.size:
+            raise ValueError(GameMessages.INVALID_NUMBER.format(last=self.board.size))
+        if self.board.is_cell_taken(move):
+            raise ValueError(GameMessages.CELL_TAKEN)
+        self.board.make_move(move, self.to_move)
+        self.history.append(move)
+        return self.status()
+
+
+def play_game(game, players):
+    """Play game to the end; players maps each symbol to its player"""
+    while game.status() == PLAYING:
+        game.apply(players[game.to_move].select_move(game.board))
+    return game.winner
+
+
+def _play_batch(player_x, player_o, start, count, seed, options):
+    if seed is not None:
+        # Seeded per batch, so results do not depend on which worker plays it
+        random.seed(f"{seed}:{start}")
+    game = HeadlessGame(**options)
+    players = {X: player_x(X), O: player_o(O)}
+    results = []
+    for index in range(start, start + count):
+        game.reset()
+        winner = play_game(game, players)
+        results.append(GameResult(index, winner, tuple(game.history)))
+    return results
+
+
+def play_many(player_x, player_o, n, workers=None, seed=None, batch_size=100, **options):
+    """
+    Play n games of player_x against player_o and yield their GameResults in
+    order. ``options`` go to HeadlessGame (board size, ``first``...). With
+    workers > 1 the batches run in that many processes, at most two batches
+    per worker in flight.
+    """
+    batches = ((start, min(batch_size, n - start)) for start in range(0, n, batch_size))
+    if workers is None or workers <= 1:
+        for start, count in batches:
+            yield from _play_batch(player_x, player_o, start, count, seed, options)
+        return
+    pool = get_pool(workers)
+    pending = deque()
+    try:
+        for start, count in batches:
+            pending.append(pool.submit(_play_batch, player_x, player_o, start, count, seed, options))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:  # The caller stopped early
+            future.cancel()
+
+
+PLAYERS = {"random": RandomMachinePlayer, "minimax": MinimaxMachinePlayer, "mcts": MCTSMachinePlayer}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play machine-vs-machine games without I/O")
+    parser.add_argument("games", type=int, nargs="?", default=1000)
+    parser.add_argument("--x", choices=PLAYERS, default="minimax", help="player moving first")
+    parser.add_argument("--o", choices=PLAYERS, default="random")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--board-backend", choices=BOARD_BACKENDS, default=DEFAULT_BACKEND)
+    parser.add_argument("--record", metavar="ARCHIVE", default=None,
+                        help="append the games to a game archive (3x3 only, see game_record.py)")
+    args = parser.parse_args()
+    if args.record and (args.rows, args.cols, args.k) != (3, 3, 3):
+        raise SystemExit("error: only 3x3 games can be recorded")
+
+    counts = {X: 0, O: 0, None: 0}
+    writer = GameWriter(args.record) if args.record else None
+    started = time.perf_counter()
+    for result in play_many(PLAYERS[args.x], PLAYERS[args.o], args.games, args.workers, args.seed,
+                            board_backend=args.board_backend, rows=args.rows, cols=args.cols, k=args.k):
+        counts[result.winner] += 1
+        if writer is not None:
+            writer.write_game(result)
+    elapsed = time.perf_counter() - started
+    if writer is not None:
+        writer.close()
+    print(f"{args.games} games in {elapsed:.2f}s ({args.games / elapsed:,.0f} games/s)")
+    print(f"X ({args.x}) wins: {counts[X]}  O ({args.o}) wins: {counts[O]}  Draws: {counts[None]}")
+
+
+if __name__ == "__main__":
+    main()
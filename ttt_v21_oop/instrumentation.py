@@ -0,0 +1,147 @@
+"""
+Hook-based instrumentation of the machine players and the search.
+
+Players, engines and games take an optional ``instrumentation`` object and
+call its hooks; with None (the default) nothing is measured, so it costs a
+single ``is None`` check per move or search.
+
+``SearchMetrics`` is the collecting implementation: search counters, per-move
+wall-time histograms with p50/p99, and per-game summaries, exported as JSON or
+Prometheus text.
+"""
+
+import bisect
+import json
+import threading
+from collections import defaultdict, deque
+
+# Upper bounds (seconds) of the move latency histogram buckets
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNTERS = ("nodes", "terminals", "cutoffs", "table_hits", "table_misses", "table_cross_hits")
+
+
+class Instrumentation:
+    """Hooks called by players, engines and games; every hook does nothing here"""
+    def on_search(self, stats):
+        """A search finished; stats maps counter names (see COUNTERS) to values"""
+
+    def on_move(self, player, seconds, stats=None):
+        """A machine player took seconds to choose a move"""
+
+    def on_game_end(self, winner, moves):
+        """A game finished; winner is None on a draw"""
+
+
+class SearchMetrics(Instrumentation):
+    """Collects counters, latencies and game summaries (thread safe)"""
+    def __init__(self, max_samples=10_000, max_games=1_000):
+        self._lock = threading.Lock()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.max_depth = 0
+        self.searches = 0
+        self._buckets = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+        self._latency_sum = defaultdict(float)
+        self._samples = defaultdict(lambda: deque(maxlen=max_samples))
+        self.games = deque(maxlen=max_games)
+        self._results = defaultdict(int)
+        self._max_samples = max_samples
+        self._game_moves = deque(maxlen=max_samples)  # Move latencies of the game in progress
+
+    def on_search(self, stats):
+        with self._lock:
+            self.searches += 1
+            for name in COUNTERS:
+                self.counters[name] += stats.get(name, 0)
+            self.max_depth = max(self.max_depth, stats.get("max_depth", 0))
+
+    def on_move(self, player, seconds, stats=None):
+        if stats is not None:
+            self.on_search(stats)
+        name = player if isinstance(player, str) else type(player).__name__
+        with self._lock:
+            self._buckets[name][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            self._latency_sum[name] += seconds
+            self._samples[name].append(seconds)
+            self._game_moves.append(seconds)
+
+    def on_game_end(self, winner, moves):
+        result = "draw" if winner is None else str(winner)
+        with self._lock:
+            self._results[result] += 1
+            thinking = self._game_moves
+            self.games.append({
+                "result": result,
+                "moves": moves,
+                "machine_moves": len(thinking),
+                "think_seconds": sum(thinking),
+                "max_move_seconds": max(thinking, default=0.0),
+            })
+            self._game_moves = deque(maxlen=self._max_samples)
+
+    def percentile(self, q, player=None):
+        """Move latency (seconds) at quantile q in [0, 1] over the recent samples"""
+        with self._lock:
+            if player is None:
+                samples = sorted(s for values in self._samples.values() for s in values)
+            else:
+                samples = sorted(self._samples.get(player, ()))
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def summary(self) -> dict:
+        with self._lock:
+            players = {
+                name: {
+                    "moves": sum(buckets),
+                    "seconds_total": self._latency_sum[name],
+                    "buckets": dict(zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], buckets)),
+                }
+                for name, buckets in self._buckets.items()
+            }
+            summary = {
+                "searches": self.searches,
+                "counters": dict(self.counters),
+                "max_depth": self.max_depth,
+                "results": dict(self._results),
+                "games": list(self.games),
+            }
+        for name, data in players.items():
+            data["p50_seconds"] = self.percentile(0.50, name)
+            data["p99_seconds"] = self.percentile(0.99, name)
+        summary["players"] = players
+        return summary
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.summary(), **kwargs)
+
+    def to_prometheus(self, prefix="tictactoe") -> str:
+        """Render the metrics in the Prometheus text exposition format"""
+        summary = self.summary()
+        lines = []
+        for name, value in summary["counters"].items():
+            lines += [f"# TYPE {prefix}_search_{name}_total counter",
+                      f"{prefix}_search_{name}_total {value}"]
+        lines += [f"# TYPE {prefix}_searches_total counter",
+                  f"{prefix}_searches_total {summary['searches']}",
+                  f"# TYPE {prefix}_search_max_depth gauge",
+                  f"{prefix}_search_max_depth {summary['max_depth']}",
+                  f"# TYPE {prefix}_games_total counter"]
+        for result, count in summary["results"].items():
+            lines.append(f'{prefix}_games_total{{result="{result}"}} {count}')
+        lines.append(f"# TYPE {prefix}_move_seconds histogram")
+        for player, data in summary["players"].items():
+            cumulative = 0
+            for bound, count in data["buckets"].items():
+                cumulative += count
+                lines.append(f'{prefix}_move_seconds_bucket{{player="{player}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_move_seconds_sum{{player="{player}"}} {data["seconds_total"]}')
+            lines.append(f'{prefix}_move_seconds_count{{player="{player}"}} {data["moves"]}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write the metrics to path: Prometheus text for *.prom, JSON otherwise"""
+        content = self.to_prometheus() if path.endswith(".prom") else self.to_json(indent=2)
+        with open(path, "w") as f:
+            f.write(content)
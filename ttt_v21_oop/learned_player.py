@@ -0,0 +1,232 @@
+"""
+Learned 3x3 player: a value table trained by self-play. Requires NumPy.
+
+The table holds one value per canonical position rank (the smallest base-3
+rank, as in perfect_play.py, among the eight rotations and reflections):
+the expected result for X (+1 X wins, -1 O wins, 0 draw) after a move
+reached that position. X moves to the highest value, O to the lowest.
+
+Training plays a batch of games at once as an ``(N, 9)`` int8 array. Every
+ply scores all the moves of all the unfinished games with one table lookup,
+plays the best ones (or a random one, with probability ``epsilon``) and
+checks wins with the line incidence matrix of batch_simulator. When the
+batch is over, TD(0) moves the value of every position reached towards the
+value of the next one (the result, at the end of a game), averaging the
+updates of positions reached in several games.
+
+Checkpoints are compressed ``.npz`` files with the float32 table and the
+number of games it was trained on.
+
+Usage::
+
+    python learned_player.py [--games N] [--batch N] [--checkpoint PATH]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from batch_simulator import EMPTY, FIRST, SECOND, line_matrix
+from board_geometry import STANDARD
+from player import MachinePlayer, RandomMachinePlayer
+from perfect_play import POSITIONS, position_rank
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "learned_values.npz")
+_POWERS = 3 ** np.arange(STANDARD.size)
+
+
+def _canonical_ranks() -> np.ndarray:
+    """rank -> smallest rank of its rotations and reflections, for every rank"""
+    digits = (np.arange(POSITIONS)[:, None] // _POWERS) % 3  # (ranks, cells)
+    images = [digits[:, [permutation.index(cell) - 1 for cell in STANDARD.cells]] @ _POWERS
+              for permutation in STANDARD.symmetries]
+    return np.min(images, axis=0)
+
+
+CANONICAL = _canonical_ranks()
+
+
+def load_values(path=DEFAULT_PATH):
+    """(values, games trained) of a checkpoint"""
+    with np.load(path) as checkpoint:
+        return checkpoint["values"].astype(np.float32), int(checkpoint["games"])
+
+
+def save_values(values, games, path=DEFAULT_PATH):
+    temporary = path + ".tmp.npz"
+    np.savez_compressed(temporary, values=values.astype(np.float32), games=np.int64(games))
+    os.replace(temporary, path)
+
+
+class SelfPlayTrainer:
+    """Batched TD(0) self-play training of a value table"""
+    def __init__(self, values=None, games=0, alpha=0.2, epsilon=0.1, seed=None):
+        self.values = values if values is not None else np.zeros(POSITIONS, dtype=np.float32)
+        self.games = games  # Games trained so far
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.rng = np.random.default_rng(seed)
+        self._lines = line_matrix(STANDARD)
+
+    def play_batch(self, count):
+        """
+        Play count games; returns the canonical rank reached at every ply
+        (-1 once a game is over), whether each move was exploratory, and the
+        result of every game for X.
+        """
+        size = STANDARD.size
+        boards = np.zeros((count, size), dtype=np.int8)
+        ranks = np.zeros(count, dtype=np.int64)
+        reached = np.full((count, size), -1, dtype=np.int64)
+        explored = np.zeros((count, size), dtype=bool)
+        results = np.zeros(count, dtype=np.float32)
+        active = np.arange(count)
+        for ply in range(size):
+            if active.size == 0:
+                break
+            player = FIRST if ply % 2 == 0 else SECOND
+            current = boards[active]
+            free = current == EMPTY
+            after = np.where(free, ranks[active, None] + player * _POWERS, 0)  # Rank after each move
+            scores = self.values[CANONICAL[after]]
+            if player == SECOND:
+                scores = -scores
+            scores[~free] = -np.inf
+            moves = scores.argmax(axis=1)
+            explore = self.rng.random(active.size) < self.epsilon
+            if explore.any():
+                keys = self.rng.random((int(explore.sum()), size))
+                keys[~free[explore]] = -1.0
+                moves[explore] = keys.argmax(axis=1)
+            boards[active, moves] = player
+            ranks[active] += player * _POWERS[moves]
+            reached[active, ply] = CANONICAL[ranks[active]]
+            explored[active, ply] = explore
+            won = ((boards[active] == player).astype(np.float32) @ self._lines >= STANDARD.k).any(axis=1)
+            results[active[won]] = 1.0 if player == FIRST else -1.0
+            active = active[~won]
+        return reached, explored, results
+
+    def update(self, reached, explored, results):
+        """Apply the TD(0) updates of a played batch"""
+        values = self.values
+        games = np.arange(reached.shape[0])
+        lengths = (reached >= 0).sum(axis=1)
+        # The last position of a game is worth its result exactly
+        values[reached[games, lengths - 1]] = results
+        for ply in range(reached.shape[1] - 2, -1, -1):
+            # Positions followed by a greedy move, learning from that move
+            mask = (lengths > ply + 1) & ~explored[:, ply + 1]
+            if not mask.any():
+                continue
+            states = reached[mask, ply]
+            deltas = values[reached[mask, ply + 1]] - values[states]
+            totals = np.bincount(states, weights=deltas, minlength=POSITIONS)
+            counts = np.bincount(states, minlength=POSITIONS)
+            seen = counts > 0
+            values[seen] += self.alpha * (totals[seen] / counts[seen]).astype(np.float32)
+
+    def train(self, games, batch_size=4096, progress=None):
+        """Train on games more games; returns the games per second"""
+        started = time.perf_counter()
+        remaining = games
+        while remaining > 0:
+            count = min(batch_size, remaining)
+            self.update(*self.play_batch(count))
+            self.games += count
+            remaining -= count
+            if progress is not None:
+                progress(games - remaining, games)
+        return games / (time.perf_counter() - started)
+
+
+class LearnedMachinePlayer(MachinePlayer):
+    """Machine player choosing the move to the best position in a learned value table"""
+    def __init__(self, symbol, checkpoint=None, values=None, instrumentation=None):
+        super().__init__(symbol, instrumentation)
+        self.games_trained = 0
+        if values is None:
+            path = checkpoint or DEFAULT_PATH
+            if os.path.exists(path):
+                values, self.games_trained = load_values(path)
+            elif checkpoint is not None:
+                raise FileNotFoundError(f"No checkpoint at {checkpoint}")
+            else:
+                values = np.zeros(POSITIONS, dtype=np.float32)  # Untrained
+        # Plain lists: scalar lookups on them are much faster than on arrays
+        self._values = values.tolist()
+        self._canonical = CANONICAL.tolist()
+        self._digit = 1 if str(symbol) == 'X' else 2
+
+    def _select_move(self, board):
+        if not board.geometry.is_standard:
+            raise ValueError("LearnedMachinePlayer only plays on the 3x3 board")
+        rank = position_rank(board)
+        sign = 1 if self._digit == 1 else -1
+        values, canonical, digit = self._values, self._canonical, self._digit
+        best_move, best_score = None, None
+        for cell in board.get_free_cells():
+            score = sign * values[canonical[rank + digit * 3 ** (cell - 1)]]
+            if best_score is None or score > best_score:
+                best_move, best_score = cell, score
+        return best_move
+
+
+def _evaluate(values, games=200):
+    """Results of the learned player against random and minimax opponents, and its latency"""
+    from headless import HeadlessGame, play_game, X, O
+    from player import MinimaxMachinePlayer
+    report = {}
+    for name, opponent in (("random", RandomMachinePlayer), ("minimax", MinimaxMachinePlayer)):
+        counts = {"wins": 0, "draws": 0, "losses": 0}
+        for index in range(games):
+            side = X if index % 2 == 0 else O
+            learned = LearnedMachinePlayer(side, values=values)
+            players = {side: learned, side.opponent: opponent(side.opponent)}
+            winner = play_game(HeadlessGame(), players)
+            counts["draws" if winner is None else "wins" if winner == side else "losses"] += 1
+        report[name] = counts
+
+    player, game = LearnedMachinePlayer(X, values=values), HeadlessGame()
+    moves, started = 0, time.perf_counter()
+    while moves < 10_000:
+        game.reset()
+        while game.status() == "playing":
+            game.apply(player.select_move(game.board))
+            moves += 1
+    report["latency_us"] = 1e6 * (time.perf_counter() - started) / moves
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the learned player by self-play")
+    parser.add_argument("--games", type=int, default=200_000, help="games to train on")
+    parser.add_argument("--batch", type=int, default=4096, help="games played at once")
+    parser.add_argument("--alpha", type=float, default=0.2)
+    parser.add_argument("--epsilon", type=float, default=0.1, help="share of random moves")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--checkpoint", metavar="PATH", default=DEFAULT_PATH,
+                        help="resume from and save to PATH (default: %(default)s)")
+    parser.add_argument("--fresh", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    values, games = (load_values(args.checkpoint) if os.path.exists(args.checkpoint) and not args.fresh
+                     else (None, 0))
+    trainer = SelfPlayTrainer(values, games, args.alpha, args.epsilon, args.seed)
+    rate = trainer.train(args.games, args.batch,
+                         lambda done, total: print(f"\r{done}/{total} games", end="", flush=True))
+    save_values(trainer.values, trainer.games, args.checkpoint)
+    print(f"\nTrained on {args.games:,} games ({rate:,.0f} games/s), {trainer.games:,} in total;"
+          f" saved to {args.checkpoint}")
+
+    report = _evaluate(trainer.values)
+    for name in ("random", "minimax"):
+        counts = report[name]
+        print(f"Against {name}: {counts['wins']} wins, {counts['draws']} draws, {counts['losses']} losses")
+    print(f"Inference: {report['latency_us']:.1f} us per move")
+
+
+if __name__ == "__main__":
+    main()
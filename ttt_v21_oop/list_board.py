@@ -0,0 +1,80 @@
+from board_geometry import get_geometry
+
+
+class ListBoard:
+    """
+    Tic-Tac-Toe board stored as a list of rows, each a list of cells (None
+    when empty), like the single-file list-of-lists version.
+
+    It exposes the same public API as ``GameBoard``; the winner is found by
+    scanning every line.
+    """
+    def __init__(self, rows=3, cols=3, k=3):
+        """Initialize an empty game board."""
+        self.geometry = get_geometry(rows, cols, k)
+        self._rows = [[None] * cols for _ in range(rows)]
+        self._moves = 0
+
+    def __getitem__(self, cell):
+        row, col = divmod(cell - 1, self.geometry.cols)
+        return self._rows[row][col]
+
+    def __setitem__(self, cell, symbol):
+        row, col = divmod(cell - 1, self.geometry.cols)
+        previous = self._rows[row][col]
+        self._rows[row][col] = symbol
+        self._moves += (symbol is not None) - (previous is not None)
+
+    def make_move(self, cell, symbol):
+        """Place symbol on a free cell"""
+        self[cell] = symbol
+
+    def undo_move(self, cell):
+        """Take back the stone on cell"""
+        self[cell] = None
+
+    @property
+    def size(self) -> int:
+        return self.geometry.size
+
+    @property
+    def move_count(self) -> int:
+        return self._moves
+
+    def is_cell_taken(self, cell) -> bool:
+        return self[cell] is not None
+
+    def get_free_cells(self) -> list:
+        cols = self.geometry.cols
+        return [row * cols + col + 1
+                for row, values in enumerate(self._rows)
+                for col, value in enumerate(values) if value is None]
+
+    def count_free_cells(self) -> int:
+        return self.size - self._moves
+
+    def is_first_move(self) -> bool:
+        return self._moves == 0
+
+    def is_board_full(self) -> bool:
+        return self._moves == self.size
+
+    def check_winner(self):
+        """
+        Determine if there's a winner and return the winning symbol.
+
+        Returns:
+            Symbol or None: Winning player's symbol, or None if no winner
+        """
+        for line in self.geometry.lines:
+            first = self[line[0]]
+            if first is not None and all(self[cell] == first for cell in line[1:]):
+                return first
+        return None
+
+    def __str__(self):
+        """Return a string representation of the current board state."""
+        def cell_display(cell):
+            symbol = self[cell]
+            return symbol if symbol is not None else cell
+        return self.geometry.render(cell_display)
@@ -1,9 +1,58 @@
+import argparse
+from board_backends import BOARD_BACKENDS, DEFAULT_BACKEND
+from instrumentation import SearchMetrics
+from qubic_game import QubicGame
 from ttt_game import TicTacToeGame
+from ultimate_game import UltimateGame
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Play Tic-Tac-Toe against the machine")
+    parser.add_argument("--rows", type=int, default=3, help="number of rows (default: 3)")
+    parser.add_argument("--cols", type=int, default=3, help="number of columns (default: 3)")
+    parser.add_argument("-k", "--k", type=int, default=3,
+                        help="symbols in a row needed to win (default: 3)")
+    variants = parser.add_mutually_exclusive_group()
+    variants.add_argument("--ultimate", action="store_true",
+                          help="play Ultimate Tic-Tac-Toe (nine sub-boards)")
+    variants.add_argument("--qubic", action="store_true",
+                          help="play Qubic, 3D Tic-Tac-Toe on a 4x4x4 cube")
+    parser.add_argument("--board-backend", choices=BOARD_BACKENDS, default=DEFAULT_BACKEND,
+                        help="board representation (default: %(default)s)")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="seconds the machine may think per move")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes searching the machine's moves in parallel")
+    parser.add_argument("--threads", action="store_true",
+                        help="search with --workers threads instead of processes (for free-threaded Python)")
+    parser.add_argument("--shared-table", action="store_true",
+                        help="let the --workers search with one transposition table in shared memory")
+    parser.add_argument("--ponder", action="store_true",
+                        help="let the machine think while you choose your move")
+    parser.add_argument("--metrics", metavar="PATH", default=None,
+                        help="write search metrics to PATH (Prometheus text if it ends in .prom, else JSON)")
+    return parser.parse_args()
+
 
 def main():
     """Entry point for the Tic-Tac-Toe game"""
-    game = TicTacToeGame()
+    args = parse_args()
+    metrics = SearchMetrics() if args.metrics else None
+    try:
+        if args.ultimate:
+            game = UltimateGame(args.time_budget, instrumentation=metrics)
+        elif args.qubic:
+            game = QubicGame(args.time_budget, instrumentation=metrics)
+        else:
+            game = TicTacToeGame(args.board_backend, rows=args.rows, cols=args.cols, k=args.k,
+                                 time_budget=args.time_budget, instrumentation=metrics,
+                                 workers=args.workers, ponder=args.ponder, threads=args.threads,
+                                 shared_table=args.shared_table)
+    except ValueError as error:
+        raise SystemExit(f"error: {error}")
     game.play()
+    if metrics is not None:
+        metrics.write(args.metrics)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
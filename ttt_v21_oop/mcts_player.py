@@ -0,0 +1,185 @@
+"""
+Monte Carlo tree search player (UCT).
+
+Every iteration walks down the tree choosing the child with the best UCT
+value, adds one new node, finishes the game from there with random moves on
+a pair of bitboards and backs the result up the path. The move played is the
+root child visited most often. Strength and cost are set with ``playouts``
+and/or ``time_budget``, so the player can be stopped at any time.
+
+After a move the chosen subtree is kept: when the opponent's reply is one of
+its children, the next search starts from that child with its statistics.
+
+With ``batch_rollouts=N`` each new node is scored with N rollouts at once by
+batch_simulator (needs NumPy), trading iterations for less noisy leaves.
+"""
+
+import math
+import random
+import time
+from player import MachinePlayer
+from search import SearchResult, board_bits
+
+DEFAULT_PLAYOUTS = 2000
+EXPLORATION = math.sqrt(2)
+CLOCK_INTERVAL = 16  # Iterations between two looks at the clock
+
+
+class _Node:
+    """A position reached by ``move``; ``value`` is summed for the player who made it"""
+    __slots__ = ("move", "parent", "children", "untried", "visits", "value", "terminal")
+
+    def __init__(self, move, parent, untried, terminal=None):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried  # Moves without a child yet
+        self.visits = 0
+        self.value = 0.0
+        self.terminal = terminal  # Result for the player who made move, if the game ended
+
+
+def _free_cells(occupied, full_mask):
+    free = full_mask & ~occupied
+    cells = []
+    while free:
+        lowest = free & -free
+        cells.append(lowest.bit_length())
+        free ^= lowest
+    return cells
+
+
+class MCTSMachinePlayer(MachinePlayer):
+    """Machine player using Monte Carlo tree search"""
+    def __init__(self, symbol, playouts=DEFAULT_PLAYOUTS, time_budget=None, exploration=EXPLORATION,
+                 batch_rollouts=None, reuse_tree=True, seed=None, instrumentation=None):
+        if playouts is None and time_budget is None:
+            raise ValueError("Set playouts, time_budget or both")
+        if playouts is not None and playouts < 1:
+            raise ValueError("playouts must be positive")
+        if time_budget is not None and time_budget <= 0:
+            raise ValueError("time_budget must be positive")
+        super().__init__(symbol, instrumentation)
+        self.playouts = playouts  # Iterations per move; None to rely on time_budget only
+        self.time_budget = time_budget  # Seconds per move; None to rely on playouts only
+        self.exploration = exploration
+        self.batch_rollouts = batch_rollouts  # Rollouts per new node through NumPy, None for one
+        self.reuse_tree = reuse_tree
+        self.random = random.Random(seed) if seed is not None else random
+        self.last_search = None
+        self._root = None
+        self._root_bits = None  # (X, O) bits of the position of _root
+        self._iterations = 0
+
+    def search_stats(self):
+        return {"nodes": self._iterations}
+
+    def _select_move(self, board):
+        geometry = board.geometry
+        self._geometry = geometry
+        x_bits, o_bits = board_bits(board, geometry)
+        mine, theirs = (x_bits, o_bits) if str(self.symbol) == 'X' else (o_bits, x_bits)
+        root = self._reused_root(x_bits, o_bits)
+        if root is None:
+            root = _Node(None, None, _free_cells(mine | theirs, geometry.full_mask))
+
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        iterations = 0
+        while self.playouts is None or iterations < self.playouts:
+            self._iterate(root, mine, theirs)
+            iterations += 1
+            if deadline is not None and iterations % CLOCK_INTERVAL == 0 \
+                    and time.perf_counter() > deadline:
+                break
+        self._iterations = iterations
+
+        best = max(root.children, key=lambda child: child.visits)
+        self.last_search = SearchResult(best.move, best.value / best.visits, iterations)
+        if self.reuse_tree:
+            best.parent = None
+            self._root = best
+            bit = 1 << (best.move - 1)
+            self._root_bits = (x_bits | bit, o_bits) if str(self.symbol) == 'X' else (x_bits, o_bits | bit)
+        return best.move
+
+    def _reused_root(self, x_bits, o_bits):
+        """The kept subtree for this position, if the opponent's reply was explored"""
+        if self._root is None or not self.reuse_tree:
+            return None
+        root, (old_x, old_o) = self._root, self._root_bits
+        self._root = None
+        if old_x & ~x_bits or old_o & ~o_bits:
+            return None  # A stone disappeared: another game
+        played = (x_bits & ~old_x) if str(self.symbol) == 'O' else (o_bits & ~old_o)
+        if played.bit_count() != 1 or (x_bits | o_bits) != (old_x | old_o | played):
+            return None  # Not exactly one opponent move later
+        for child in root.children:
+            if child.move == played.bit_length():
+                child.parent = None
+                return child
+        return None
+
+    def _iterate(self, root, mine, theirs):
+        geometry = self._geometry
+        node = root
+        # Selection: mine holds the stones of the side to move at node
+        while node.terminal is None and not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            node = max(node.children, key=lambda child: child.value / child.visits
+                       + self.exploration * math.sqrt(log_visits / child.visits))
+            mine, theirs = theirs, mine | 1 << (node.move - 1)
+        # Expansion
+        if node.terminal is None and node.untried:
+            cell = node.untried.pop(self.random.randrange(len(node.untried)))
+            placed = mine | 1 << (cell - 1)
+            occupied = placed | theirs
+            if any(placed & mask == mask for mask in geometry.masks_through[cell]):
+                child = _Node(cell, node, [], 1.0)
+            elif occupied == geometry.full_mask:
+                child = _Node(cell, node, [], 0.5)
+            else:
+                child = _Node(cell, node, _free_cells(occupied, geometry.full_mask))
+            node.children.append(child)
+            node = child
+            mine, theirs = theirs, placed
+        # Simulation, scored for the player who moved into node (theirs)
+        if node.terminal is not None:
+            result = node.terminal
+        elif self.batch_rollouts:
+            result = self._batch_rollout(theirs, mine)
+        else:
+            result = self._rollout(theirs, mine)
+        # Backpropagation
+        while node is not None:
+            node.visits += 1
+            node.value += result
+            result = 1.0 - result
+            node = node.parent
+
+    def _rollout(self, moved, to_move):
+        """Finish the game with random moves; 1 if moved's side wins, 0.5 on a draw"""
+        masks_through = self._geometry.masks_through
+        cells = _free_cells(moved | to_move, self._geometry.full_mask)
+        self.random.shuffle(cells)
+        players = [to_move, moved]
+        for ply, cell in enumerate(cells):
+            side = ply & 1
+            stones = players[side] | 1 << (cell - 1)
+            players[side] = stones
+            if any(stones & mask == mask for mask in masks_through[cell]):
+                return 0.0 if side == 0 else 1.0
+        return 0.5
+
+    def _batch_rollout(self, moved, to_move):
+        """Average of batch_rollouts random games played by batch_simulator"""
+        from batch_simulator import FIRST, SECOND, simulate  # NumPy only when asked for
+        geometry = self._geometry
+        # The side to move moved first unless it has fewer stones
+        moved_first = moved.bit_count() > to_move.bit_count()
+        first, second = (moved, to_move) if moved_first else (to_move, moved)
+        start = [FIRST if first >> (cell - 1) & 1 else SECOND if second >> (cell - 1) & 1 else 0
+                 for cell in geometry.cells]
+        result = simulate(self.batch_rollouts, seed=self.random.getrandbits(32),
+                          geometry=geometry, start=start)
+        wins = result.wins if moved_first else result.losses
+        return (wins + 0.5 * result.draws) / result.games
@@ -0,0 +1,197 @@
+"""
+Root-parallel alpha-beta search over a pool of worker processes.
+
+Every legal root move is searched in its own task, through
+``AlphaBetaEngine.search_move`` of the worker's own engine, whose
+transposition table survives between tasks. The root then picks the first
+move, in the serial engine's root order, with the best score, so a
+full-depth search chooses the same move as ``AlphaBetaEngine.search`` on the
+same board. Only full-depth results are guaranteed to match the serial
+engine: without a shared table, a depth-limited task searches with a table
+cleared for it (deeper entries of earlier tasks would change its scores),
+so its result does not depend on what the worker ran before, but the
+horizon scores may still differ from the serial search's; with one, they
+also depend on what the other workers stored.
+
+With a time budget the search ends at one deadline for all the root moves:
+each task deepens on its own for its share of the budget (the whole budget
+when there are no more moves than workers) or until the deadline, whichever
+comes first, so the root scores may come from different depths.
+
+Given a ``shared_table`` (see shared_table.py) the workers search with it
+instead of their own tables, so a position one worker has searched is a
+table hit for all the others; ``table_cross_hits`` in the stats counts
+those.
+
+Pools are created on first use, one per worker count, and reused by every
+later search of the process (moves and games alike); ``warm_up`` starts the
+worker processes ahead of the first move.
+
+``ThreadedSearch`` runs the same tasks on a pool of threads. Tasks only
+share immutable Positions and each thread searches with an engine of its
+own, so it scales with the cores on a free-threaded interpreter; with the
+GIL the threads take turns.
+"""
+
+import atexit
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from board_geometry import STANDARD
+from position import Position
+from search import AlphaBetaEngine, DEFAULT_ENGINE, SearchResult, WIN_SCORE, is_win
+
+_POOLS = {}  # workers -> ProcessPoolExecutor
+_THREAD_POOLS = {}  # workers -> ThreadPoolExecutor
+_local = threading.local()  # engines: per worker process or thread, one per table
+
+
+def get_pool(workers) -> ProcessPoolExecutor:
+    """Return the shared pool with this many workers, creating it if needed"""
+    pool = _POOLS.get(workers)
+    if pool is None:
+        pool = _POOLS[workers] = ProcessPoolExecutor(max_workers=workers)
+    return pool
+
+
+def get_thread_pool(workers) -> ThreadPoolExecutor:
+    """Return the shared thread pool with this many workers, creating it if needed"""
+    pool = _THREAD_POOLS.get(workers)
+    if pool is None:
+        pool = _THREAD_POOLS[workers] = ThreadPoolExecutor(max_workers=workers,
+                                                           thread_name_prefix="search")
+    return pool
+
+
+def shutdown_pools():
+    for pools in (_POOLS, _THREAD_POOLS):
+        for pool in pools.values():
+            pool.shutdown(cancel_futures=True)
+        pools.clear()
+
+
+atexit.register(shutdown_pools)
+
+
+def _engine(table=None, fresh=False):
+    """
+    The engine of this worker searching with table (None for its own
+    table), or with fresh, an engine of its own whose table was just cleared
+    """
+    engines = getattr(_local, "engines", None)
+    if engines is None:
+        engines = _local.engines = {}
+    name = "fresh" if fresh else None if table is None else table.name
+    engine = engines.get(name)
+    if engine is None:
+        engine = engines[name] = AlphaBetaEngine(None if fresh else table)
+    elif fresh:
+        engine.table.clear()
+    return engine
+
+
+def _warm(_):
+    _engine()
+
+
+def warm_up(workers):
+    """Start the worker processes of the pool and build their engines"""
+    wait([get_pool(workers).submit(_warm, index) for index in range(workers)])
+
+
+def _search_move(position, cell, time_budget, max_depth, table=None, deadline=None):
+    """
+    Worker task: play cell in position and search the reply for up to
+    time_budget seconds, and never past deadline (a time.perf_counter()
+    value). Returns the score of the move for the side to move at the root
+    and the counters of the search.
+    """
+    if deadline is not None:
+        # A task left waiting in the queue only gets the time that remains
+        time_budget = max(0.0, min(time_budget, deadline - time.perf_counter()))
+    engine = _engine(table, fresh=max_depth is not None and table is None)
+    result = engine.search_move(position, cell, time_budget, max_depth)
+    return result.score, result.depth, engine.last_stats
+
+
+class ParallelSearch:
+    """
+    Drop-in replacement for AlphaBetaEngine.search that spreads the root
+    moves over ``workers`` processes.
+
+    ``engine`` orders the root moves (its table move first), so ties are
+    broken as it would break them, and keeps the exact full-depth results.
+    """
+    def __init__(self, workers, engine=DEFAULT_ENGINE, instrumentation=None, shared_table=None):
+        if workers < 1:
+            raise ValueError("At least one worker is needed")
+        self.workers = workers
+        self.engine = engine
+        self.shared_table = shared_table  # Table of every worker, None for their own ones
+        self.instrumentation = instrumentation
+        self.last_stats = None
+
+    def _pool(self):
+        return get_pool(self.workers)
+
+    def search(self, board, mover, time_budget=None, max_depth=None) -> SearchResult:
+        """Same contract as AlphaBetaEngine.search"""
+        geometry = getattr(board, "geometry", STANDARD)
+        position = board if isinstance(board, Position) else Position.from_board(board, mover)
+        if position.to_move != str(mover):
+            position = Position(position.x_bits, position.o_bits, mover, geometry)
+        side = position.to_move
+        mine = position.x_bits if side == 'X' else position.o_bits
+        moves = self.engine.root_moves(position, mover)
+
+        stats = {"nodes": 1, "terminals": 0, "cutoffs": 0, "table_hits": 0,
+                 "table_misses": 0, "table_cross_hits": 0, "max_depth": 0}
+        scores = {}
+        searched = []
+        for cell in moves:
+            if is_win(mine | 1 << (cell - 1), cell, geometry):
+                stats["nodes"] += 1
+                stats["terminals"] += 1
+                scores[cell] = WIN_SCORE - 1  # Winning right now beats anything else
+            else:
+                searched.append(cell)
+        deadline = share = None
+        if time_budget is not None and searched:
+            deadline = time.perf_counter() + time_budget
+            # Tasks run in rounds of one per worker: split the budget between the rounds
+            share = time_budget * min(1.0, self.workers / len(searched))
+        pool = self._pool()
+        futures = {cell: pool.submit(_search_move, position, cell, share, max_depth,
+                                     self.shared_table, deadline)
+                   for cell in searched}
+        depths = []
+        for cell, future in futures.items():
+            scores[cell], move_depth, child = future.result()
+            depths.append(move_depth)
+            for name, value in child.items():
+                if name == "max_depth":
+                    stats[name] = max(stats[name], value + 1)
+                elif name in stats:
+                    stats[name] += value
+
+        best_move, best_score = None, -WIN_SCORE - 1
+        for cell in moves:
+            if scores[cell] > best_score:
+                best_move, best_score = cell, scores[cell]
+        if best_move is not None and time_budget is None and max_depth is None:
+            # An exact full-depth result: let the serial engine reuse it
+            self.engine.store_result(position, side, best_move, best_score)
+
+        # Every root move was searched at least this deep
+        depth = None if None in depths else min(depths, default=1)
+        stats["depth"] = depth
+        self.last_stats = stats
+        if self.instrumentation is not None:
+            self.instrumentation.on_search(stats)
+        return SearchResult(best_move, best_score, stats["nodes"], depth)
+
+
+class ThreadedSearch(ParallelSearch):
+    """ParallelSearch over a pool of ``workers`` threads instead of processes"""
+    def _pool(self):
+        return get_thread_pool(self.workers)
@@ -0,0 +1,173 @@
+"""
+Precomputed perfect-play table for the 3x3 board.
+
+Every position is identified by its base-3 rank (empty = 0, X = 1, O = 2,
+cell 1 being the least significant digit). The table stores, for each rank and
+each side to move, the minimax score from the mover's point of view and the
+best move, so a machine move becomes a single lookup in a memory-mapped file.
+
+Scores are depth aware: ``10 - n`` for a win in ``n`` plies, ``n - 10`` for a
+loss and 0 for a draw.
+
+Generate the table with::
+
+    python perfect_play.py [path]
+
+This module only depends on the standard library so the single-file versions
+of the game can use it too.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+MAGIC = b"TTTP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHII")  # magic, version, entry size, entry count, payload CRC-32
+ENTRY = struct.Struct("<bB")  # score, best move (0 when there is none)
+POSITIONS = 3 ** 9
+ENTRIES = 2 * POSITIONS  # One entry per position and side to move
+UNKNOWN = -128  # Score of positions that are unreachable or already finished
+WIN_SCORE = 10
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perfect_play.bin")
+
+_WINNING_COMBINATIONS = (
+    (1, 2, 3), (4, 5, 6), (7, 8, 9),  # Rows
+    (1, 4, 7), (2, 5, 8), (3, 6, 9),  # Columns
+    (1, 5, 9), (3, 5, 7)              # Diagonals
+)
+_DIGITS = {None: 0, "X": 1, "O": 2}
+_POWERS = tuple(3 ** (cell - 1) for cell in range(10))
+
+
+class StaleTableError(Exception):
+    """The table file is missing, corrupt or was written by another format version"""
+
+
+def _digit(symbol) -> int:
+    return _DIGITS[None if symbol is None else str(symbol)]
+
+
+def position_rank(board) -> int:
+    """Base-3 rank of a board indexed by cells 1-9"""
+    return sum(_digit(board[cell]) * _POWERS[cell] for cell in range(1, 10))
+
+
+def entry_index(rank, mover) -> int:
+    return 2 * rank + (_digit(mover) - 1)
+
+
+def solve() -> bytes:
+    """Solve every position reachable from the empty board, with either side starting"""
+    payload = bytearray(ENTRY.pack(UNKNOWN, 0) * ENTRIES)
+    cells = [0] * 10  # Digits of the current position, cell 0 unused
+    solved = {}
+
+    def negamax(rank, mover):
+        index = 2 * rank + (mover - 1)
+        if index in solved:
+            return solved[index]
+        opponent = 3 - mover
+        if any(all(cells[cell] == opponent for cell in combination)
+               for combination in _WINNING_COMBINATIONS):
+            return -WIN_SCORE  # The previous move won
+        best_score, best_move = None, 0
+        for cell in range(1, 10):
+            if cells[cell]:
+                continue
+            cells[cell] = mover
+            score = -negamax(rank + mover * _POWERS[cell], opponent)
+            cells[cell] = 0
+            score -= (score > 0) - (score < 0)  # A result one ply further away is worth less
+            if best_score is None or score > best_score:
+                best_score, best_move = score, cell
+        if best_score is None:
+            return 0  # Full board without a winner
+        ENTRY.pack_into(payload, index * ENTRY.size, best_score, best_move)
+        solved[index] = best_score
+        return best_score
+
+    negamax(0, _DIGITS["X"])
+    negamax(0, _DIGITS["O"])
+    return bytes(payload)
+
+
+def write_table(path=DEFAULT_PATH):
+    """Solve the game and write the table atomically to path"""
+    payload = solve()
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, ENTRY.size, ENTRIES, zlib.crc32(payload))
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(temporary, path)
+
+
+class PerfectPlayTable:
+    """Read-only view of a memory-mapped perfect-play table"""
+    def __init__(self, path=DEFAULT_PATH):
+        try:
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as error:
+            raise StaleTableError(f"Cannot map {path}: {error}") from error
+        try:
+            self._validate()
+        except StaleTableError:
+            self.close()
+            raise
+
+    def _validate(self):
+        if len(self._map) != HEADER.size + ENTRY.size * ENTRIES:
+            raise StaleTableError("Unexpected table size")
+        magic, version, entry_size, entries, checksum = HEADER.unpack_from(self._map)
+        if (magic, version, entry_size, entries) != (MAGIC, FORMAT_VERSION, ENTRY.size, ENTRIES):
+            raise StaleTableError("Table was written by another format version")
+        if zlib.crc32(self._map[HEADER.size:]) != checksum:
+            raise StaleTableError("Checksum mismatch")
+
+    def lookup(self, board, mover):
+        """
+        Return (best_move, score) for mover in this position, or None when
+        the table has no entry for it (finished or unreachable positions).
+        """
+        index = entry_index(position_rank(board), mover)
+        score, move = ENTRY.unpack_from(self._map, HEADER.size + index * ENTRY.size)
+        if score == UNKNOWN:
+            return None
+        return move, score
+
+    def best_move(self, board, mover):
+        entry = self.lookup(board, mover)
+        return entry[0] if entry is not None else None
+
+    def close(self):
+        self._map.close()
+
+
+_default_table = None
+_default_loaded = False
+
+
+def default_table():
+    """
+    Map the table at DEFAULT_PATH once per process. Returns None when the
+    file is missing or stale, so callers fall back to live search.
+    """
+    global _default_table, _default_loaded
+    if not _default_loaded:
+        _default_loaded = True
+        try:
+            _default_table = PerfectPlayTable(DEFAULT_PATH)
+        except StaleTableError:
+            _default_table = None
+    return _default_table
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+    write_table(target)
+    print(f"Perfect-play table written to {target}")
@@ -1,7 +1,16 @@
 from abc import ABC, abstractmethod
 from game_messages import GameMessages
 import random
-from symbol import Symbol
+import time
+from transposition_table import zobrist_for, SHARED_TABLE
+from perfect_play import default_table
+from retrograde import tablebase_for
+from search import DEFAULT_ENGINE, AlphaBetaEngine, SearchResult
+from parallel_search import ParallelSearch, ThreadedSearch
+from ponder import Ponderer
+
+# Seconds per move when searching boards too big for a full search
+LARGE_BOARD_TIME_BUDGET = 2.0
 
 class Player(ABC):
     """Abstract base class for players"""
@@ -9,47 +18,72 @@ class Player(ABC):
         self.symbol = symbol
     
     @abstractmethod
-    def make_move(self, board):
-        """Abstract method for making a move; any subclass must implement this"""
+    def select_move(self, board):
+        """Abstract method for choosing a move; any subclass must implement this"""
         pass
 
+    def make_move(self, board):
+        """Choose a move and play it on the board"""
+        board.make_move(self.select_move(board), self.symbol)
+
+    @staticmethod
+    def _oracle(geometry):
+        """The perfect-play table (3x3) or solved tablebase for geometry, None without one"""
+        if geometry.is_standard and default_table() is not None:  # None when missing or stale
+            return default_table()
+        return tablebase_for(geometry)
+
+    def start_pondering(self, board):
+        """The opponent is about to choose a move on board; players may think meanwhile"""
+
+    def stop_pondering(self):
+        """Stop any thinking started by start_pondering"""
+
 class HumanPlayer(Player):
     """Human player with input-based move selection"""
-    def make_move(self, board):
+    def select_move(self, board):
         """Prompt user for a valid move"""
         while True:
             try:
-                cell_str = input(GameMessages.ENTER_MOVE)
+                cell_str = input(GameMessages.ENTER_MOVE.format(last=board.size))
                 cell = int(cell_str)
                 
-                if not 1 <= cell <= 9:
-                    print(GameMessages.INVALID_NUMBER)
+                if not 1 <= cell <= board.size:
+                    print(GameMessages.INVALID_NUMBER.format(last=board.size))
                     continue
                 
                 if board.is_cell_taken(cell):
                     print(GameMessages.CELL_TAKEN)
                     continue
                 
-                board[cell] = self.symbol
-                break
+                return cell
             
             except ValueError:
                 print(GameMessages.INVALID_INPUT)
 
 class MachinePlayer(Player):
     """Base class for machine players with a common interface"""
-    def __init__(self, symbol):
+    def __init__(self, symbol, instrumentation=None):
         super().__init__(symbol)
+        self.instrumentation = instrumentation  # Optional hooks, see instrumentation.py
 
     @abstractmethod
     def _select_move(self, board):
         """Abstract method to select a move strategy"""
         pass
     
-    def make_move(self, board):
-        """Standard move-making process for machine players"""
+    def select_move(self, board):
+        """Standard move-selection process for machine players"""
+        if self.instrumentation is None:
+            return self._select_move(board)
+        started = time.perf_counter()
         move = self._select_move(board)
-        board[move] = self.symbol
+        self.instrumentation.on_move(self, time.perf_counter() - started, self.search_stats())
+        return move
+
+    def search_stats(self):
+        """Counters of the search behind the last move, or None if there was none"""
+        return None
 
 
 class RandomMachinePlayer(MachinePlayer):
@@ -57,21 +91,94 @@ class RandomMachinePlayer(MachinePlayer):
     def _select_move(self, board):
         """Simple random move strategy"""
         if board.is_first_move():
-            return 5
+            return board.geometry.center
         
         free_cells = board.get_free_cells()
         return random.choice(free_cells)
 
 class MinimaxMachinePlayer(MachinePlayer):
     """Machine player using minimax algorithm for intelligent moves"""
-    
+    def __init__(self, symbol, table=None, use_perfect_play=True, engine=DEFAULT_ENGINE,
+                 time_budget=None, instrumentation=None, workers=None, ponder=False, max_depth=None,
+                 threads=False, shared_table=None):
+        super().__init__(symbol, instrumentation)
+        # Positions already solved, reused across moves and games
+        self.table = table if table is not None else SHARED_TABLE
+        self.use_perfect_play = use_perfect_play
+        self.engine = engine  # None searches with the plain minimax below
+        self.time_budget = time_budget  # Seconds per move; None searches to the end on 3x3
+        self.max_depth = max_depth  # Plies the search may look ahead; None for no limit
+        self.workers = workers  # Processes for a root-parallel search; None or 1 searches serially
+        self.threads = threads  # Whether the workers are threads instead of processes
+        # Table in shared memory (see shared_table.py) for this player's searches and its workers' ones
+        self.shared_table = shared_table
+        if shared_table is not None and engine is DEFAULT_ENGINE:
+            self.engine = AlphaBetaEngine(shared_table)
+        self.ponder = ponder  # Search the replies while the opponent thinks
+        self.last_search = None
+        self.nodes = 0
+        self._last_stats = None
+        self._ponderer = None
+
+    def search_stats(self):
+        return self._last_stats
+
+    def _search_budget(self, board):
+        if self.time_budget is None and not board.geometry.is_standard:
+            return LARGE_BOARD_TIME_BUDGET
+        return self.time_budget
+
+    def start_pondering(self, board):
+        if not self.ponder or self.engine is None:
+            return
+        if self.use_perfect_play and self._oracle(board.geometry) is not None:
+            return  # Every reply is a table lookup already
+        if self._ponderer is None:
+            self._ponderer = Ponderer(self.engine.table)
+        self._ponderer.start(board, self.symbol, self._search_budget(board))
+
+    def stop_pondering(self):
+        if self._ponderer is not None:
+            self._ponderer.stop()
+
     def _select_move(self, board):
         """Find the best move using minimax algorithm"""
-        best_move, _ = self.minimax(board, True)
+        self._last_stats = None
+        if self.use_perfect_play:
+            oracle = self._oracle(board.geometry)
+            if oracle is not None:
+                move = oracle.best_move(board, self.symbol)
+                if move is not None:
+                    return move
+        if self.engine is not None:
+            if self._ponderer is not None and self._ponderer.active:
+                answer = self._ponderer.take(board)
+                if answer is not None:
+                    self.last_search = answer
+                    self._last_stats = {"nodes": 0, "pondered": True}
+                    return answer.move
+            time_budget = self._search_budget(board)
+            engine = self.engine
+            if self.workers is not None and self.workers > 1:
+                search_class = ThreadedSearch if self.threads else ParallelSearch
+                engine = search_class(self.workers, self.engine, shared_table=self.shared_table)
+            self.last_search = engine.search(board, self.symbol, time_budget, self.max_depth)
+            self._last_stats = engine.last_stats
+            return self.last_search.move
+        self.nodes = 0
+        hits, misses = self.table.hits, self.table.misses
+        best_move, score = self.minimax(board, True)
+        self.last_search = SearchResult(best_move, score, self.nodes)
+        self._last_stats = {
+            "nodes": self.nodes,
+            "table_hits": self.table.hits - hits,
+            "table_misses": self.table.misses - misses,
+        }
         return best_move
 
-    def minimax(self, board, is_maximizing: bool):
+    def minimax(self, board, is_maximizing: bool, hashes=None):
         """Minimax algorithm to evaluate the best move"""
+        self.nodes += 1
         winner = board.check_winner()
         if winner == self.symbol:
             return None, 1
@@ -79,15 +186,26 @@ class MinimaxMachinePlayer(MachinePlayer):
             return None, -1
         elif board.is_board_full():
             return None, 0
-        
+
+        zobrist = zobrist_for(board.geometry)
+        if hashes is None:
+            hashes = zobrist.board_hashes(board)
+        mover = self.symbol if is_maximizing else self.symbol.opponent
+        key, symmetry = zobrist.canonical(hashes, mover)
+        entry = self.table.probe(key)
+        if entry is not None:  # Scores are stored from the mover's point of view
+            best_move = zobrist.from_canonical(entry.best_move, symmetry)
+            return best_move, entry.score if is_maximizing else -entry.score
+
         best_score = float('-inf') if is_maximizing else float('inf')
         best_move = None
-        
-        for cell in board.get_free_cells():
-            original_value = board[cell]  # Store the original value
-            board[cell] = self.symbol if is_maximizing else Symbol.HUMAN
-            _, score = self.minimax(board, not is_maximizing)
-            board[cell] = original_value  # Restore the original value
+        free_cells = board.get_free_cells()
+
+        for cell in free_cells:
+            board.make_move(cell, mover)
+            _, score = self.minimax(board, not is_maximizing,
+                                    zobrist.play(hashes, cell, mover))
+            board.undo_move(cell)
             
             if is_maximizing:
                 if score > best_score:
@@ -97,5 +215,31 @@ class MinimaxMachinePlayer(MachinePlayer):
                 if score < best_score:
                     best_score = score
                     best_move = cell
-        
-        return best_move, best_score
\ No newline at end of file
+
+        self.table.store(key, len(free_cells),
+                         best_score if is_maximizing else -best_score,
+                         zobrist.to_canonical(best_move, symmetry))
+        return best_move, best_score
+
+# Difficulty levels, weakest first
+DIFFICULTY_LEVELS = ("easy", "medium", "hard", "expert")
+
+
+def create_machine_player(level, symbol, **options):
+    """
+    A machine player of the given difficulty: random moves, a 2-ply search,
+    a search of up to 4 plies and 0.1 s per move, or perfect play. The
+    limited searches get an engine of their own, so they never reuse the
+    deeper results of another player. options (time budget, workers...) go
+    to the expert player; the other levels keep their own budgets.
+    """
+    if level == "easy":
+        return RandomMachinePlayer(symbol)
+    if level == "medium":
+        return MinimaxMachinePlayer(symbol, use_perfect_play=False, engine=AlphaBetaEngine(), max_depth=2)
+    if level == "hard":
+        return MinimaxMachinePlayer(symbol, use_perfect_play=False, engine=AlphaBetaEngine(),
+                                    max_depth=4, time_budget=0.1)
+    if level == "expert":
+        return MinimaxMachinePlayer(symbol, **options)
+    raise ValueError(f"Unknown difficulty level: {level!r}")
@@ -0,0 +1,86 @@
+"""
+Pondering: think about the replies while the opponent is still choosing.
+
+``Ponderer.start`` takes a snapshot of the board and, on a background
+thread, searches the machine's reply to every legal opponent move, most
+promising moves first. It only ever reads its own snapshot, an immutable
+Position, so the live board may change while it works. ``Ponderer.take``
+is called with the board once the opponent has moved: it stops the thread
+and returns the reply found for that move, if its search had finished.
+
+The background engine shares the transposition table of the player's
+engine, so even unfinished work speeds up the search that follows. The
+two engines never run at the same time: ``take`` and ``stop`` wait for the
+thread to end.
+"""
+
+import threading
+from position import Position
+from search import AlphaBetaEngine, board_bits
+
+
+class Ponderer:
+    """Background search of the replies to each possible opponent move"""
+    def __init__(self, table):
+        self.engine = AlphaBetaEngine(table)
+        self.answers = {}  # Opponent move -> SearchResult of the reply
+        self._stop = threading.Event()
+        self._thread = None
+        self._snapshot = None
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None
+
+    def start(self, board, symbol, time_budget=None):
+        """Start pondering the replies of symbol (the machine) on board"""
+        self.stop()
+        self._snapshot = Position.from_board(board, symbol.opponent)
+        self.answers = {}
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(symbol, time_budget),
+                                        name="ponder", daemon=True)
+        self._thread.start()
+
+    def _run(self, symbol, time_budget):
+        snapshot = self._snapshot
+        occupied = snapshot.occupied
+        for cell in snapshot.geometry.static_order:
+            if self._stop.is_set():
+                return
+            if occupied >> (cell - 1) & 1:
+                continue
+            position = snapshot.play(cell)
+            if position.is_over():
+                continue  # The game ends with that move: nothing to reply
+            result = self.engine.search(position, symbol, time_budget, stop=self._stop)
+            if not self.engine.last_stats["stopped"]:
+                self.answers[cell] = result
+
+    def stop(self):
+        """Stop the background search and wait for it"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def take(self, board):
+        """
+        Stop pondering and return the prepared reply to the move just played
+        on board, or None when it was not ready (or board is not one move
+        after the snapshot).
+        """
+        self.stop()
+        if self._snapshot is None:
+            return None
+        snapshot, self._snapshot = self._snapshot, None
+        geometry, x_bits, o_bits = snapshot.geometry, snapshot.x_bits, snapshot.o_bits
+        if board.geometry is not geometry:
+            return None
+        new_x, new_o = board_bits(board, geometry)
+        if new_x & x_bits != x_bits or new_o & o_bits != o_bits:
+            return None
+        played = (new_x | new_o) & ~(x_bits | o_bits)
+        if played.bit_count() != 1:
+            return None
+        return self.answers.get(played.bit_length())
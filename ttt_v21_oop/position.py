@@ -0,0 +1,131 @@
+"""
+Immutable positions: the stones of both sides as two bitboards.
+
+A ``Position`` never changes once built. ``play`` returns a new position
+instead of writing to a board, so any number of searches, on any threads,
+can start from the same position without copying it, and positions can be
+dict keys and set members. Cell ``n`` is bit ``n - 1``, as in BitBoard.
+
+Positions read like boards (``position[cell]`` is 'X', 'O' or None and
+``geometry`` is set), so AlphaBetaEngine searches them directly.
+"""
+
+from board_geometry import STANDARD, get_geometry
+
+
+class Position:
+    """Stones of X and O on a board, and the side to move"""
+    __slots__ = ("x_bits", "o_bits", "to_move", "geometry")
+
+    def __init__(self, x_bits=0, o_bits=0, to_move='X', geometry=STANDARD):
+        if x_bits & o_bits:
+            raise ValueError("A cell holds stones of both sides")
+        if (x_bits | o_bits) & ~geometry.full_mask:
+            raise ValueError("Stones outside the board")
+        to_move = str(to_move)
+        if to_move not in ('X', 'O'):
+            raise ValueError(f"Invalid side to move: {to_move!r}")
+        setter = object.__setattr__
+        setter(self, "x_bits", x_bits)
+        setter(self, "o_bits", o_bits)
+        setter(self, "to_move", to_move)
+        setter(self, "geometry", geometry)
+
+    @classmethod
+    def from_board(cls, board, to_move='X') -> "Position":
+        """Snapshot of any board whose cells print as 'X'/'O' (or are None)"""
+        geometry = getattr(board, "geometry", STANDARD)
+        x_bits = o_bits = 0
+        for cell in geometry.cells:
+            symbol = board[cell]
+            if symbol is None:
+                continue
+            if str(symbol) == 'X':
+                x_bits |= 1 << (cell - 1)
+            else:
+                o_bits |= 1 << (cell - 1)
+        return cls(x_bits, o_bits, to_move, geometry)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Position is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Position is immutable")
+
+    def __reduce__(self):
+        # Rebuilt from its dimensions: geometries are shared per process
+        geometry = self.geometry
+        return _rebuild, (self.x_bits, self.o_bits, self.to_move,
+                          geometry.rows, geometry.cols, geometry.k)
+
+    def __eq__(self, other):
+        if not isinstance(other, Position):
+            return NotImplemented
+        return (self.x_bits == other.x_bits and self.o_bits == other.o_bits
+                and self.to_move == other.to_move and self._dimensions() == other._dimensions())
+
+    def __hash__(self):
+        return hash((self.x_bits, self.o_bits, self.to_move, self._dimensions()))
+
+    def __repr__(self):
+        return (f"Position(x_bits={self.x_bits:#x}, o_bits={self.o_bits:#x}, "
+                f"to_move={self.to_move!r}, geometry={self.geometry!r})")
+
+    def __str__(self):
+        return self.geometry.render(lambda cell: self[cell] or cell)
+
+    def __getitem__(self, cell):
+        bit = 1 << (cell - 1)
+        if self.x_bits & bit:
+            return 'X'
+        if self.o_bits & bit:
+            return 'O'
+        return None
+
+    def _dimensions(self):
+        geometry = self.geometry
+        return geometry.rows, geometry.cols, geometry.k
+
+    @property
+    def occupied(self) -> int:
+        return self.x_bits | self.o_bits
+
+    def play(self, cell) -> "Position":
+        """The position after the side to move places a stone on cell"""
+        bit = 1 << (cell - 1)
+        if (self.x_bits | self.o_bits) & bit or not 1 <= cell <= self.geometry.size:
+            raise ValueError(f"Cell {cell} is not free")
+        cls = type(self)
+        position = cls.__new__(cls)
+        setter = object.__setattr__
+        if self.to_move == 'X':
+            setter(position, "x_bits", self.x_bits | bit)
+            setter(position, "o_bits", self.o_bits)
+            setter(position, "to_move", 'O')
+        else:
+            setter(position, "x_bits", self.x_bits)
+            setter(position, "o_bits", self.o_bits | bit)
+            setter(position, "to_move", 'X')
+        setter(position, "geometry", self.geometry)
+        return position
+
+    def free_cells(self) -> list:
+        occupied = self.x_bits | self.o_bits
+        return [cell for cell in self.geometry.cells if not occupied >> (cell - 1) & 1]
+
+    def winner(self):
+        """'X' or 'O' when that side has a line, else None"""
+        for side, bits in (('X', self.x_bits), ('O', self.o_bits)):
+            if any(bits & mask == mask for mask in self.geometry.line_masks):
+                return side
+        return None
+
+    def is_full(self) -> bool:
+        return self.x_bits | self.o_bits == self.geometry.full_mask
+
+    def is_over(self) -> bool:
+        return self.is_full() or self.winner() is not None
+
+
+def _rebuild(x_bits, o_bits, to_move, rows, cols, k):
+    return Position(x_bits, o_bits, to_move, get_geometry(rows, cols, k))
@@ -0,0 +1,309 @@
+"""
+Qubic: 3D Tic-Tac-Toe on a 4x4x4 cube, four in a row (76 lines) wins.
+
+Cells are numbered 0-63 as ``16 * layer + 4 * row + col`` (shown to people
+as 1-64) and each side's stones are one 64-bit integer. Every line keeps a
+counter of the stones of both sides, updated for the 4 to 7 lines through
+the cell of each move, so a win, the heuristic score and the open threats
+(three stones and an empty cell) are all maintained in constant time per
+move.
+
+``QubicEngine`` is an iterative-deepening negamax alpha-beta search with a
+transposition table and threat detection: a side with an open threat wins
+at once, and a side facing one must block it (two of them lose).
+"""
+
+import random
+import time
+from itertools import product
+from player import MachinePlayer
+from search import (SearchResult, WIN_SCORE, WIN_THRESHOLD, MAX_EVALUATION,
+                    score_to_table, score_from_table)
+from transposition_table import EXACT, LOWER_BOUND, UPPER_BOUND
+
+SIZE = 4
+CELLS = SIZE ** 3
+FULL = (1 << CELLS) - 1
+DEFAULT_TIME_BUDGET = 1.0  # Seconds per machine move
+
+
+def _lines():
+    """The 76 lines as tuples of cells"""
+    lines = set()
+    directions = [d for d in product((-1, 0, 1), repeat=3) if d > (0, 0, 0)]
+    for start in product(range(SIZE), repeat=3):
+        for direction in directions:
+            cells = [tuple(s + i * d for s, d in zip(start, direction)) for i in range(SIZE)]
+            if all(0 <= c < SIZE for cell in cells for c in cell):
+                lines.add(tuple(sorted(16 * z + 4 * y + x for z, y, x in cells)))
+    return tuple(sorted(lines))
+
+
+LINES = _lines()
+LINE_MASKS = tuple(sum(1 << cell for cell in line) for line in LINES)
+LINES_THROUGH = tuple(tuple(index for index, line in enumerate(LINES) if cell in line)
+                      for cell in range(CELLS))
+# Cells on more lines (corners and the inner cube) first
+MOVE_ORDER = tuple(sorted(range(CELLS), key=lambda cell: -len(LINES_THROUGH[cell])))
+
+# A line's state is x + 5 * o, its stone counts; X adds 1 per stone and O adds 5
+_STEP = {'X': 1, 'O': 5}
+_X_WIN, _O_WIN = 4, 20
+_X_THREAT, _O_THREAT = 3, 15  # Three stones of one side and nothing else
+_LINE_WEIGHTS = (0, 1, 4, 16, 0)
+# Heuristic value of every line state for X
+LINE_VALUES = tuple((_LINE_WEIGHTS[x] if o == 0 else -_LINE_WEIGHTS[o] if x == 0 else 0)
+                    if x + o <= SIZE else 0
+                    for o in range(5) for x in range(5))
+
+# Change of that value when a side adds a stone to a line in a given state
+_GAINS = {side: tuple(LINE_VALUES[state + step] - LINE_VALUES[state] if state + step < 25 else 0
+                      for state in range(25))
+          for side, step in _STEP.items()}
+_BEFORE_THREAT = {'X': _X_THREAT - 1, 'O': _O_THREAT - 5}  # One more stone makes a threat
+
+_rng = random.Random(64)
+_KEYS = {side: tuple(_rng.getrandbits(64) for _ in range(CELLS)) for side in "XO"}
+_SIDE_KEY = _rng.getrandbits(64)
+
+
+def _other(side):
+    return 'O' if side == 'X' else 'X'
+
+
+class QubicBoard:
+    """Position of a Qubic game; sides are 'X' and 'O'"""
+    def __init__(self, first='X'):
+        self.bits = {'X': 0, 'O': 0}  # Side -> 64-bit mask of its stones
+        self.line_states = [0] * len(LINES)
+        self.threats = {'X': set(), 'O': set()}  # Side -> indices of lines it can complete
+        self.score = 0  # Heuristic value for X
+        self.winner = None
+        self.to_move = first
+        self.history = []
+        self.hash = 0
+
+    @property
+    def occupied(self) -> int:
+        return self.bits['X'] | self.bits['O']
+
+    def is_over(self) -> bool:
+        return self.winner is not None or self.occupied == FULL
+
+    def legal_moves(self) -> list:
+        if self.winner is not None:
+            return []
+        occupied = self.occupied
+        return [cell for cell in MOVE_ORDER if not occupied >> cell & 1]
+
+    def threat_cells(self, side) -> set:
+        """Empty cells completing a line for side"""
+        occupied = self.occupied
+        return {(LINE_MASKS[line] & ~occupied).bit_length() - 1 for line in self.threats[side]}
+
+    def _shift_lines(self, cell, step):
+        states, values = self.line_states, LINE_VALUES
+        x_threats, o_threats = self.threats['X'], self.threats['O']
+        score = self.score
+        for line in LINES_THROUGH[cell]:
+            old = states[line]
+            new = old + step
+            states[line] = new
+            score += values[new] - values[old]
+            if old == _X_THREAT:
+                x_threats.discard(line)
+            elif old == _O_THREAT:
+                o_threats.discard(line)
+            if new == _X_THREAT:
+                x_threats.add(line)
+            elif new == _O_THREAT:
+                o_threats.add(line)
+            elif new == _X_WIN:
+                self.winner = 'X'
+            elif new == _O_WIN:
+                self.winner = 'O'
+        self.score = score
+
+    def make_move(self, cell):
+        side = self.to_move
+        self.bits[side] |= 1 << cell
+        self._shift_lines(cell, _STEP[side])
+        self.history.append(cell)
+        self.hash ^= _KEYS[side][cell] ^ _SIDE_KEY
+        self.to_move = _other(side)
+
+    def undo_move(self):
+        """Take back the last move"""
+        cell = self.history.pop()
+        side = _other(self.to_move)
+        self.bits[side] &= ~(1 << cell)
+        self.winner = None  # Games end at the first win
+        self._shift_lines(cell, -_STEP[side])
+        self.hash ^= _KEYS[side][cell] ^ _SIDE_KEY
+        self.to_move = side
+
+    def __str__(self):
+        x, o = self.bits['X'], self.bits['O']
+        rows = ["   ".join(f"{f'Layer {layer + 1}':<11}" for layer in range(SIZE)).rstrip()]
+        for row in range(SIZE):
+            parts = []
+            for layer in range(SIZE):
+                cells = []
+                for col in range(SIZE):
+                    cell = 16 * layer + 4 * row + col
+                    cells.append(' X' if x >> cell & 1 else ' O' if o >> cell & 1 else f"{cell + 1:>2}")
+                parts.append(" ".join(cells))
+            rows.append("   ".join(parts))
+        return "\n".join(rows)
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+class QubicEngine:
+    """Iterative-deepening negamax alpha-beta with threat detection and a transposition table"""
+    CHECK_INTERVAL = 4096  # Nodes between two looks at the clock
+
+    def __init__(self, table_size=1 << 20):
+        self.table = {}  # Position hash -> (depth, bound, score, best move)
+        self.table_size = table_size
+        self.nodes = 0
+        self.last_stats = None
+        self._deadline = None
+
+    def search(self, board, time_budget=DEFAULT_TIME_BUDGET, max_depth=None) -> SearchResult:
+        """Best move for the side to move, searching until time_budget or max_depth runs out"""
+        moves = board.legal_moves()
+        if not moves:
+            raise ValueError("The game is over")
+        if len(self.table) > self.table_size:
+            self.table.clear()
+        self.nodes = 0
+        started = time.perf_counter()
+        self._deadline = None if time_budget is None else started + time_budget
+        best = SearchResult(moves[0], 0, 0)
+        completed = 0
+        depth = 1
+        while max_depth is None or depth <= max_depth:
+            try:
+                score = self._negamax(board, depth, -WIN_SCORE, WIN_SCORE, 0)
+            except _SearchTimeout:
+                break
+            best = SearchResult(self.table[board.hash][3], score, self.nodes)
+            completed = depth
+            if abs(score) > WIN_THRESHOLD or depth >= len(moves):
+                break  # Solved
+            depth += 1
+        elapsed = time.perf_counter() - started
+        self.last_stats = {"nodes": self.nodes, "max_depth": completed,
+                           "nodes_per_second": self.nodes / elapsed if elapsed else 0.0}
+        return SearchResult(best.move, best.score, self.nodes)
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes % self.CHECK_INTERVAL == 0 and self._deadline is not None \
+                and time.perf_counter() > self._deadline and ply:
+            raise _SearchTimeout
+        if board.winner is not None:
+            return -WIN_SCORE + ply  # The previous move won
+        side = board.to_move
+        if board.threats[side]:
+            if ply == 0:
+                self._store(board.hash, depth, EXACT, WIN_SCORE - 1, ply,
+                            min(board.threat_cells(side)))
+            return WIN_SCORE - ply - 1  # Completes a line next move
+        forced = board.threats[_other(side)]
+        if forced:
+            cells = board.threat_cells(_other(side))
+            if len(cells) > 1:
+                if ply == 0:
+                    self._store(board.hash, depth, EXACT, -WIN_SCORE + 2, ply, min(cells))
+                return -WIN_SCORE + ply + 2  # Cannot block them all
+            moves = list(cells)
+            depth += 1  # A forced reply does not use up the depth
+        else:
+            if depth <= 0:
+                score = max(-MAX_EVALUATION, min(MAX_EVALUATION, board.score))
+                return score if side == 'X' else -score
+            moves = board.legal_moves()
+            if not moves:
+                return 0
+
+        key = board.hash
+        entry = self.table.get(key)
+        if entry is not None:
+            entry_depth, bound, stored, table_move = entry
+            if entry_depth >= depth and ply:
+                stored = score_from_table(stored, ply)
+                if bound == EXACT:
+                    return stored
+                if bound == LOWER_BOUND and stored >= beta:
+                    return stored
+                if bound == UPPER_BOUND and stored <= alpha:
+                    return stored
+            if table_move in moves and moves[0] != table_move:
+                moves.remove(table_move)
+                moves.insert(0, table_move)
+
+        original_alpha = alpha
+        best_score, best_move = -WIN_SCORE, moves[0]
+        states, gains, before_threat = board.line_states, _GAINS[side], _BEFORE_THREAT[side]
+        for move in moves:
+            score = None
+            if depth == 1:
+                # Neither side has a threat here, so unless the move makes one the
+                # child is a quiet leaf: score it from the lines through the move
+                gain = 0
+                for line in LINES_THROUGH[move]:
+                    state = states[line]
+                    if state == before_threat:
+                        break
+                    gain += gains[state]
+                else:
+                    self.nodes += 1
+                    score = max(-MAX_EVALUATION, min(MAX_EVALUATION, board.score + gain))
+                    if side == 'O':
+                        score = -score
+            if score is None:
+                board.make_move(move)
+                try:
+                    score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+                finally:
+                    board.undo_move()
+            if score > best_score:
+                best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        bound = (UPPER_BOUND if best_score <= original_alpha
+                 else LOWER_BOUND if best_score >= beta else EXACT)
+        self._store(key, depth, bound, best_score, ply, best_move)
+        return best_score
+
+    def _store(self, key, depth, bound, score, ply, move):
+        self.table[key] = (depth, bound, score_to_table(score, ply), move)
+
+
+class QubicMachinePlayer(MachinePlayer):
+    """Machine player searching with QubicEngine"""
+    def __init__(self, symbol, time_budget=None, instrumentation=None):
+        super().__init__(symbol, instrumentation)
+        self.time_budget = time_budget  # Seconds per move; None for DEFAULT_TIME_BUDGET
+        self.engine = QubicEngine()
+        self.last_search = None
+
+    def search_stats(self):
+        return self.engine.last_stats
+
+    def _select_move(self, board):
+        budget = DEFAULT_TIME_BUDGET if self.time_budget is None else self.time_budget
+        self.last_search = self.engine.search(board, budget)
+        return self.last_search.move
+
+
+class QubicRandomPlayer(MachinePlayer):
+    """Machine player choosing among the legal moves at random"""
+    def _select_move(self, board):
+        return random.choice(board.legal_moves())
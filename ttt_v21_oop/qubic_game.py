@@ -0,0 +1,64 @@
+from game_messages import GameMessages
+from player import Player
+from symbol import Symbol
+from qubic import CELLS, QubicBoard, QubicMachinePlayer, QubicRandomPlayer
+
+
+class QubicHumanPlayer(Player):
+    """Human player typing the number (1-64) of the cell of each move"""
+    def select_move(self, board):
+        """Prompt user for a valid move"""
+        while True:
+            try:
+                cell = int(input(GameMessages.ENTER_MOVE.format(last=CELLS)))
+            except ValueError:
+                print(GameMessages.INVALID_INPUT)
+                continue
+            if not 1 <= cell <= CELLS:
+                print(GameMessages.INVALID_NUMBER.format(last=CELLS))
+                continue
+            if board.occupied >> (cell - 1) & 1:
+                print(GameMessages.CELL_TAKEN)
+                continue
+            return cell - 1
+
+
+class QubicGame:
+    """Manages a 4x4x4 Qubic game between a human and the machine"""
+
+    RANDOM = '1'
+    FIRST_PLAYER_HUMAN = '1'
+
+    def __init__(self, time_budget=None, instrumentation=None):
+        self.board = QubicBoard()
+        self.time_budget = time_budget  # Seconds per machine move, None for the default
+        self.instrumentation = instrumentation  # Optional hooks, see instrumentation.py
+
+    def play(self):
+        """
+        Main game loop
+        """
+        if input(GameMessages.DIFFICULTY_PROMPT) == self.RANDOM:
+            machine = QubicRandomPlayer(Symbol.AI)
+        else:
+            machine = QubicMachinePlayer(Symbol.AI, self.time_budget)
+        machine.instrumentation = self.instrumentation
+        first = Symbol.HUMAN if input(GameMessages.FIRST_PLAYER_PROMPT) == self.FIRST_PLAYER_HUMAN \
+            else Symbol.AI
+        players = {str(Symbol.HUMAN): QubicHumanPlayer(Symbol.HUMAN), str(Symbol.AI): machine}
+
+        self.board = board = QubicBoard(str(first))
+        print(board)
+        while not board.is_over():
+            board.make_move(players[board.to_move].select_move(board))
+            print(board)
+
+        winner = board.winner
+        if winner is None:
+            print(GameMessages.DRAW)
+        elif winner == str(Symbol.AI):
+            print(GameMessages.MACHINE_WIN)
+        else:
+            print(GameMessages.HUMAN_WIN)
+        if self.instrumentation is not None:
+            self.instrumentation.on_game_end(winner and Symbol(winner), len(board.history))
@@ -0,0 +1,396 @@
+"""
+Retrograde solver: complete win/loss/draw tablebases of m x n, k games.
+
+A position is stored relative to the side to move, as the key
+``mover | other << size`` of the two bitboards, so the table does not
+depend on who moved first. Level ``n`` holds the reachable positions with
+``n`` stones.
+
+The solver runs in two passes over the levels, a chunk of positions at a
+time, keeping each level in a file of its own:
+
+1. Forward, it generates the children of every unfinished position of a
+   level; each chunk's children are sorted into a run file and the runs are
+   merged (dropping duplicates) into the next level.
+2. Backward, from the full boards down to the empty one, it labels every
+   position of a level from the labels of its children in the level above:
+   a win if some move leaves the opponent lost, a draw if some move draws,
+   a loss otherwise, with the distance in plies to the end of the game for
+   wins and losses.
+
+The result is one file: a header, a directory of levels, and per level the
+sorted 64-bit keys followed by one byte per position (result in the top two
+bits, distance in the rest). The header holds a CRC-32 of everything after
+it, and a file whose size, directory or checksum does not match is
+rejected as a whole. ``Tablebase`` memory-maps it and finds a
+position with a binary search in its level, which makes it an exact oracle
+for the machine players (see ``tablebase_for``). Boards of up to 32 cells
+are supported.
+
+Usage::
+
+    python retrograde.py ROWS COLS K [--output PATH]
+"""
+
+import argparse
+import heapq
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import zlib
+from array import array
+from bisect import bisect_left
+from board_geometry import get_geometry
+from search import board_bits
+
+MAGIC = b"TTTR"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHBBBxxxI")  # magic, version, rows, cols, k, CRC-32 of the rest (16 bytes)
+LEVEL = struct.Struct("<QQ")  # Offset of the level's keys, number of positions
+MAX_CELLS = 32  # Two bitboards in a 64-bit key
+CHUNK_POSITIONS = 1 << 16  # Positions read, labelled or sorted per step
+
+DRAW, WIN, LOSS = 0, 1, 2  # For the side to move
+_DISTANCE_BITS = 6
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tablebases")
+
+
+class TablebaseError(Exception):
+    """The file is not a tablebase this version can read (or is truncated or corrupt)"""
+
+
+def default_path(rows, cols, k):
+    return os.path.join(DEFAULT_DIR, f"{rows}x{cols}k{k}.ttb")
+
+
+def _write_keys(path, keys):
+    with open(path, "ab") as f:
+        array("Q", keys).tofile(f)
+
+
+def _read_chunks(path, typecode="Q", chunk=CHUNK_POSITIONS):
+    """Yield the arrays of a level file, chunk items at a time"""
+    with open(path, "rb") as f:
+        while True:
+            items = array(typecode)
+            try:
+                items.fromfile(f, chunk)
+            except EOFError:  # Last, shorter chunk (possibly empty)
+                pass
+            if not items:
+                return
+            yield items
+
+
+def _iter_keys(path):
+    for chunk in _read_chunks(path):
+        yield from chunk
+
+
+def _level_size(count):
+    return 9 * count + (-count % 8)  # Keys, values, padding to 8 bytes
+
+
+def _checksum(data, start, chunk=1 << 20):
+    """CRC-32 of data[start:], a chunk at a time"""
+    checksum = 0
+    for offset in range(start, len(data), chunk):
+        checksum = zlib.crc32(data[offset:offset + chunk], checksum)
+    return checksum
+
+
+class RetrogradeSolver:
+    """Build the tablebase of one board size, working in workdir"""
+    def __init__(self, rows, cols, k, workdir, chunk=CHUNK_POSITIONS):
+        self.geometry = get_geometry(rows, cols, k)
+        if self.geometry.size > MAX_CELLS:
+            raise ValueError(f"Tablebases are limited to {MAX_CELLS} cells")
+        self.workdir = workdir
+        self.chunk = chunk
+        self.counts = []  # Positions per level
+
+    def _path(self, kind, level):
+        return os.path.join(self.workdir, f"{kind}{level}.bin")
+
+    def _won(self, bits):
+        return any(bits & mask == mask for mask in self.geometry.line_masks)
+
+    def _children(self, key):
+        size, full = self.geometry.size, self.geometry.full_mask
+        mover, other = key & full, key >> size
+        free = full & ~(mover | other)
+        while free:
+            low = free & -free
+            free ^= low
+            yield other | (mover | low) << size
+
+    def enumerate_positions(self):
+        """Forward pass: write the sorted keys of every level"""
+        _write_keys(self._path("keys", 0), [0])
+        self.counts = [1]
+        for level in range(self.geometry.size):
+            runs = []
+            for keys in _read_chunks(self._path("keys", level), chunk=self.chunk):
+                children = set()
+                for key in keys:
+                    if not self._won(key >> self.geometry.size):  # Unfinished
+                        children.update(self._children(key))
+                run = self._path(f"run{len(runs)}_", level + 1)
+                _write_keys(run, sorted(children))
+                runs.append(run)
+            target = self._path("keys", level + 1)
+            open(target, "wb").close()
+            count, batch, previous = 0, [], None
+            for key in heapq.merge(*(_iter_keys(run) for run in runs)):
+                if key == previous:
+                    continue
+                previous = key
+                batch.append(key)
+                if len(batch) >= self.chunk:
+                    _write_keys(target, batch)
+                    count += len(batch)
+                    batch = []
+            _write_keys(target, batch)
+            self.counts.append(count + len(batch))
+            for run in runs:
+                os.remove(run)
+
+    def label_positions(self):
+        """Backward pass: write the result byte of every position, level by level"""
+        size = self.geometry.size
+        for level in range(size, -1, -1):
+            above = _LevelView(self._path("keys", level + 1), self._path("values", level + 1)) \
+                if level < size else None
+            target = self._path("values", level)
+            with open(target, "wb") as out:
+                for keys in _read_chunks(self._path("keys", level), chunk=self.chunk):
+                    values = array("B")
+                    for key in keys:
+                        if self._won(key >> size):
+                            values.append(LOSS << _DISTANCE_BITS)  # The previous move won
+                        elif level == size:
+                            values.append(DRAW << _DISTANCE_BITS)
+                        else:
+                            values.append(_best(above.value(child) for child in self._children(key))[0])
+                    values.tofile(out)
+            if above is not None:
+                above.close()
+
+    def write(self, path):
+        """Assemble the level files into the tablebase at path (atomically)"""
+        geometry = self.geometry
+        directory_size = LEVEL.size * len(self.counts)
+        offset = HEADER.size + directory_size
+        temporary = path + ".tmp"
+        with open(temporary, "w+b") as out:
+            out.write(bytes(HEADER.size))  # Written last, with the checksum
+            for count in self.counts:
+                out.write(LEVEL.pack(offset, count))
+                offset += _level_size(count)
+            for level, count in enumerate(self.counts):
+                for kind in ("keys", "values"):
+                    with open(self._path(kind, level), "rb") as f:
+                        shutil.copyfileobj(f, out)
+                out.write(bytes(-count % 8))
+            out.flush()
+            with mmap.mmap(out.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                checksum = _checksum(data, HEADER.size)
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, FORMAT_VERSION, geometry.rows, geometry.cols, geometry.k,
+                                  checksum))
+        os.replace(temporary, path)
+
+    def solve(self, path):
+        self.enumerate_positions()
+        self.label_positions()
+        self.write(path)
+
+
+def _best(child_values):
+    """(value byte, best index) for the mover, from the value bytes of its children"""
+    best_rank, best_value, best_index = None, None, None
+    for index, child in enumerate(child_values):
+        result, distance = child >> _DISTANCE_BITS, child & ((1 << _DISTANCE_BITS) - 1)
+        if result == LOSS:
+            rank, value = 100 - distance, WIN << _DISTANCE_BITS | distance + 1
+        elif result == WIN:
+            rank, value = distance - 100, LOSS << _DISTANCE_BITS | distance + 1
+        else:
+            rank, value = 0, DRAW << _DISTANCE_BITS
+        if best_rank is None or rank > best_rank:
+            best_rank, best_value, best_index = rank, value, index
+    return best_value, best_index
+
+
+class _LevelView:
+    """Memory-mapped sorted keys and values of one level file pair"""
+    def __init__(self, keys_path, values_path):
+        self._files = [open(keys_path, "rb"), open(values_path, "rb")]
+        self._maps = [mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(f.name) else b""
+                      for f in self._files]
+        self.keys = memoryview(self._maps[0]).cast("Q")
+        self.values = self._maps[1]
+
+    def value(self, key):
+        return self.values[bisect_left(self.keys, key)]
+
+    def close(self):
+        self.keys.release()
+        for item in self._maps:
+            if isinstance(item, mmap.mmap):
+                item.close()
+        for f in self._files:
+            f.close()
+
+
+class Tablebase:
+    """Read-only, memory-mapped tablebase"""
+    def __init__(self, path):
+        try:
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as error:
+            raise TablebaseError(f"Cannot map {path}: {error}") from error
+        try:
+            directory = self._validate(path)
+        except TablebaseError:
+            self._map.close()
+            raise
+        view = memoryview(self._map)
+        self._levels = []
+        for offset, count in directory:
+            keys = view[offset:offset + 8 * count].cast("Q")
+            self._levels.append((keys, view[offset + 8 * count:offset + 9 * count]))
+        self._view = view
+
+    def _validate(self, path):
+        """Check the header, the level directory, the size and the checksum; returns the directory"""
+        data = self._map
+        if len(data) < HEADER.size:
+            raise TablebaseError(f"{path} is not a tablebase")
+        magic, version, rows, cols, k, checksum = HEADER.unpack_from(data)
+        if (magic, version) != (MAGIC, FORMAT_VERSION):
+            raise TablebaseError(f"{path} is not a version {FORMAT_VERSION} tablebase")
+        try:
+            self.geometry = get_geometry(rows, cols, k)
+        except ValueError as error:
+            raise TablebaseError(f"{path}: {error}") from error
+        levels = self.geometry.size + 1
+        offset = HEADER.size + levels * LEVEL.size
+        if self.geometry.size > MAX_CELLS or len(data) < offset:
+            raise TablebaseError(f"{path} is truncated")
+        directory = []
+        for level in range(levels):
+            entry = LEVEL.unpack_from(data, HEADER.size + level * LEVEL.size)
+            if entry[0] != offset:
+                raise TablebaseError(f"{path} has a corrupt level directory")
+            directory.append(entry)
+            offset += _level_size(entry[1])
+        if len(data) != offset:
+            raise TablebaseError(f"Unexpected size of {path}")
+        if _checksum(data, HEADER.size) != checksum:
+            raise TablebaseError(f"Checksum mismatch in {path}")
+        return directory
+
+    def __len__(self):
+        return sum(len(keys) for keys, _ in self._levels)
+
+    def probe(self, mover_bits, other_bits):
+        """(result, distance) for the side to move, or None for unreachable positions"""
+        key = mover_bits | other_bits << self.geometry.size
+        keys, values = self._levels[(mover_bits | other_bits).bit_count()]
+        index = bisect_left(keys, key)
+        if index == len(keys) or keys[index] != key:
+            return None
+        value = values[index]
+        return value >> _DISTANCE_BITS, value & ((1 << _DISTANCE_BITS) - 1)
+
+    def _bits(self, board, mover):
+        x_bits, o_bits = board_bits(board, self.geometry)
+        return (x_bits, o_bits) if str(mover) == 'X' else (o_bits, x_bits)
+
+    def lookup(self, board, mover):
+        """(result, distance) of board for mover, or None when it is not in the table"""
+        return self.probe(*self._bits(board, mover))
+
+    def best_move(self, board, mover):
+        """A move keeping the best result for mover (fastest win, slowest loss), or None"""
+        mover_bits, other_bits = self._bits(board, mover)
+        if self.probe(mover_bits, other_bits) is None:
+            return None
+        full = self.geometry.full_mask
+        if any(other_bits & mask == mask for mask in self.geometry.line_masks):
+            return None  # Already over
+        cells, children = [], []
+        free = full & ~(mover_bits | other_bits)
+        while free:
+            low = free & -free
+            free ^= low
+            cells.append(low.bit_length())
+            result, distance = self.probe(other_bits, mover_bits | low)
+            children.append(result << _DISTANCE_BITS | distance)
+        if not cells:
+            return None
+        return cells[_best(children)[1]]
+
+    def close(self):
+        for keys, values in self._levels:
+            keys.release()
+            values.release()
+        self._view.release()
+        self._map.close()
+
+
+_tablebases = {}
+
+
+def tablebase_for(geometry):
+    """
+    The tablebase of geometry from DEFAULT_DIR, mapped once per process, or
+    None when there is none (or it cannot be read, or holds another size).
+    """
+    size = (geometry.rows, geometry.cols, geometry.k)
+    if size not in _tablebases:
+        path = default_path(*size)
+        try:
+            tablebase = Tablebase(path) if os.path.exists(path) else None
+        except TablebaseError:
+            tablebase = None
+        if tablebase is not None and (tablebase.geometry.rows, tablebase.geometry.cols,
+                                      tablebase.geometry.k) != size:
+            tablebase.close()
+            tablebase = None
+        _tablebases[size] = tablebase
+    return _tablebases[size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve every position of an m x n, k game")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("cols", type=int)
+    parser.add_argument("k", type=int)
+    parser.add_argument("--output", metavar="PATH", default=None,
+                        help=f"tablebase file (default: {DEFAULT_DIR}/ROWSxCOLSkK.ttb)")
+    parser.add_argument("--chunk", type=int, default=CHUNK_POSITIONS, help="positions per step")
+    args = parser.parse_args()
+
+    output = args.output or default_path(args.rows, args.cols, args.k)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output))) as workdir:
+        try:
+            solver = RetrogradeSolver(args.rows, args.cols, args.k, workdir, args.chunk)
+        except ValueError as error:
+            raise SystemExit(f"error: {error}")
+        solver.solve(output)
+    names = {WIN: "first player wins", DRAW: "draw", LOSS: "second player wins"}
+    result, distance = Tablebase(output).probe(0, 0)
+    print(f"{sum(solver.counts):,} positions written to {output}")
+    print(f"{args.rows}x{args.cols}, k={args.k}: {names[result]}"
+          + (f" in {distance} plies" if result != DRAW else ""))
+
+
+if __name__ == "__main__":
+    main()
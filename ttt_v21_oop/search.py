@@ -0,0 +1,377 @@
+"""
+Alpha-beta search engine shared by MinimaxMachinePlayer and the single-file
+minimax versions.
+
+The engine copies the board into two bitboards (one per symbol) and runs a
+negamax alpha-beta search on them, so any board whose cells print as
+'X'/'O' (or are None) can be searched. Boards without a ``geometry``
+attribute, like the dicts of the single-file versions, are taken as 3x3.
+
+- Scores are depth aware: a win in ``n`` plies is worth ``WIN_SCORE - n``, so
+  faster wins and slower losses are preferred.
+- Moves are ordered: transposition-table move first, then killer moves, then
+  cells on more lines (center, corners and edges on 3x3).
+- Positions are cached in a symmetry-aware transposition table.
+- Only the lines through the last move are checked for a win.
+- With a time budget (or a depth limit) the search deepens iteratively,
+  scoring the positions at the horizon with a heuristic, and returns the
+  best move of the deepest iteration it completed in time (an anytime
+  search): each iteration tries the previous one's best move first, no
+  iteration starts once half the budget is gone, and the result's ``depth``
+  tells how many plies were searched.
+- A ``stop`` event (threading.Event) ends a search early from another
+  thread; ``last_stats["stopped"]`` tells whether that happened.
+- ``root_moves`` and ``search_move`` give the root move order and search a
+  single root move, for the root-parallel searches of parallel_search.py.
+- Every search reports the number of nodes it visited; ``last_stats`` holds
+  the full counters of the last search, also passed to the optional
+  ``instrumentation`` hooks (see instrumentation.py).
+"""
+
+import time
+from collections import namedtuple
+from board_geometry import STANDARD
+from position import Position
+from transposition_table import (zobrist_for, TranspositionTable,
+                                 EXACT, LOWER_BOUND, UPPER_BOUND)
+
+WIN_SCORE = 1_000_000
+WIN_THRESHOLD = WIN_SCORE - 10_000  # Scores beyond this are wins/losses at some distance
+MAX_EVALUATION = WIN_THRESHOLD - 1
+
+# depth: plies of the deepest completed iteration (None when unknown)
+SearchResult = namedtuple("SearchResult", ["move", "score", "nodes", "depth"], defaults=[None])
+
+
+class _SearchTimeout(Exception):
+    """Raised inside the recursion when the time budget runs out"""
+
+
+def _other(side):
+    return 'O' if side == 'X' else 'X'
+
+
+def score_to_table(score, ply):
+    """Make a win/loss score relative to the node instead of the root"""
+    if score > WIN_THRESHOLD:
+        return score + ply
+    if score < -WIN_THRESHOLD:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    if score > WIN_THRESHOLD:
+        return score - ply
+    if score < -WIN_THRESHOLD:
+        return score + ply
+    return score
+
+
+def board_bits(board, geometry=STANDARD):
+    """Return the (X, O) bitboards of a board"""
+    if isinstance(board, Position):
+        return board.x_bits, board.o_bits
+    x_bits = o_bits = 0
+    for cell in geometry.cells:
+        symbol = board[cell]
+        if symbol is None:
+            continue
+        if str(symbol) == 'X':
+            x_bits |= 1 << (cell - 1)
+        else:
+            o_bits |= 1 << (cell - 1)
+    return x_bits, o_bits
+
+
+def is_win(bits, cell, geometry=STANDARD) -> bool:
+    """Whether the stones in bits complete a line through cell"""
+    for mask in geometry.masks_through[cell]:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+def line_weights(k):
+    """Heuristic value of a line holding n (index) stones of only one side"""
+    return (0,) + tuple(4 ** n for n in range(k - 1)) + (0,)
+
+
+class AlphaBetaEngine:
+    """Negamax alpha-beta search with a transposition table and move ordering"""
+    CHECK_INTERVAL = 1024  # Nodes between two looks at the clock
+    NEXT_ITERATION_SHARE = 0.5  # No new iteration once this share of the time budget is used
+
+    def __init__(self, table=None, instrumentation=None):
+        # Scores here are depth aware and may be bounds, so the table is not
+        # shared with the plain minimax one
+        self.table = table if table is not None else TranspositionTable()
+        self.instrumentation = instrumentation
+        self.last_stats = None
+        self._reset_counters()
+        self._deadline = None
+        self._stop = None
+        self._root_move = None  # Tried first at the root: the previous iteration's best move
+        self._prepare(STANDARD)
+
+    def _reset_counters(self):
+        self.nodes = self.terminals = self.cutoffs = self.max_ply = 0
+        # cross_hits: only tables shared between processes (see shared_table.py) count them
+        self._table_probes = (self.table.hits, self.table.misses, getattr(self.table, "cross_hits", 0))
+        self._stopped = False
+
+    def _must_stop(self) -> bool:
+        if self._stop is not None and self._stop.is_set():
+            self._stopped = True
+            return True
+        return self._deadline is not None and time.perf_counter() > self._deadline
+
+    def _finish(self, move, score, depth=None) -> SearchResult:
+        hits, misses, cross_hits = self._table_probes
+        self.last_stats = {
+            "nodes": self.nodes,
+            "terminals": self.terminals,
+            "cutoffs": self.cutoffs,
+            "table_hits": self.table.hits - hits,
+            "table_misses": self.table.misses - misses,
+            "table_cross_hits": getattr(self.table, "cross_hits", 0) - cross_hits,
+            "max_depth": self.max_ply,
+            "depth": depth,
+            "stopped": self._stopped,
+        }
+        if self.instrumentation is not None:
+            self.instrumentation.on_search(self.last_stats)
+        return SearchResult(move, score, self.nodes, depth)
+
+    def _prepare(self, geometry):
+        self._geometry = geometry
+        self._zobrist = zobrist_for(geometry)
+        self._weights = line_weights(geometry.k)
+        self._killers = [[None, None] for _ in range(geometry.size + 1)]
+
+    def search(self, board, mover, time_budget=None, max_depth=None, stop=None) -> SearchResult:
+        """
+        Return the best move for mover, its score and the nodes visited.
+
+        Without a time budget or depth limit the game tree is searched to the
+        end. Otherwise the search deepens one ply at a time until the limit is
+        reached, the result is decided or ``time_budget`` seconds run out.
+        When ``stop`` is set the search ends as if out of time; a full search
+        stopped that way returns no move.
+        """
+        geometry = getattr(board, "geometry", STANDARD)
+        self._prepare(geometry)
+        x_bits, o_bits = board_bits(board, geometry)
+        side = str(mover)
+        mine, theirs = (x_bits, o_bits) if side == 'X' else (o_bits, x_bits)
+        hashes = self._zobrist.board_hashes(board)
+        remaining = geometry.size - (x_bits | o_bits).bit_count()
+        self._reset_counters()
+        self._stop = stop
+
+        if time_budget is None and max_depth is None:
+            self._deadline = None
+            try:
+                score, move = self._negamax(mine, theirs, side, hashes, 0, remaining,
+                                            -WIN_SCORE - 1, WIN_SCORE + 1)
+                depth = remaining
+            except _SearchTimeout:
+                score, move, depth = 0, None, None
+            finally:
+                self._stop = None
+            return self._finish(move, score, depth)
+
+        started = time.perf_counter()
+        self._deadline = started + time_budget if time_budget is not None else None
+        limit = remaining if max_depth is None else min(max_depth, remaining)
+        moves = self._ordered_moves(x_bits | o_bits, 0, None)
+        best_move, best_score, completed = (moves[0] if moves else None), 0, 0
+        try:
+            for depth in range(1, limit + 1):
+                self._root_move = best_move if completed else None
+                score, move = self._negamax(mine, theirs, side, hashes, 0, depth,
+                                            -WIN_SCORE - 1, WIN_SCORE + 1)
+                best_move, best_score, completed = move, score, depth
+                if WIN_SCORE - abs(score) <= depth:
+                    break  # Won or lost within the horizon: deeper searches cannot change it
+                if time_budget is not None and \
+                        time.perf_counter() - started > self.NEXT_ITERATION_SHARE * time_budget:
+                    break  # The next iteration would most likely not finish in time
+        except _SearchTimeout:
+            pass  # Keep the move of the deepest completed iteration
+        finally:
+            self._deadline = None
+            self._stop = None
+            self._root_move = None
+        return self._finish(best_move, best_score, completed)
+
+    def root_moves(self, board, mover) -> list:
+        """Legal moves of board in the order a search for mover tries them at the root"""
+        geometry = getattr(board, "geometry", STANDARD)
+        self._prepare(geometry)
+        zobrist = self._zobrist
+        key, symmetry = zobrist.canonical(zobrist.board_hashes(board), str(mover))
+        entry = self.table.probe(key)
+        table_move = None if entry is None else zobrist.from_canonical(entry.best_move, symmetry)
+        x_bits, o_bits = board_bits(board, geometry)
+        return self._ordered_moves(x_bits | o_bits, 0, table_move)
+
+    def search_move(self, position, cell, time_budget=None, max_depth=None) -> SearchResult:
+        """
+        Search one root move: play cell for the side to move in position (a
+        Position) and search the reply. The result's score is the move's, for
+        the side to move; max_depth and the result's depth count the move
+        itself. Root-parallel searches (see parallel_search.py) call this
+        once per root move.
+        """
+        reply = position.play(cell)
+        if max_depth == 1 and not reply.is_full():
+            # The reply is at the horizon: score it as search does
+            self._prepare(reply.geometry)
+            self._reset_counters()
+            self.nodes = 1
+            mine, theirs = ((reply.x_bits, reply.o_bits) if reply.to_move == 'X'
+                            else (reply.o_bits, reply.x_bits))
+            result = self._finish(None, self._evaluate(mine, theirs), 0)
+        else:
+            result = self.search(reply, reply.to_move, time_budget,
+                                 None if max_depth is None else max_depth - 1)
+        # The reply's score is for the opponent, one ply below the root
+        return SearchResult(cell, -score_from_table(result.score, 1), result.nodes,
+                            None if result.depth is None else result.depth + 1)
+
+    def store_result(self, board, mover, move, score):
+        """Keep an exact full-depth result for board, as a full search would"""
+        geometry = getattr(board, "geometry", STANDARD)
+        self._prepare(geometry)
+        zobrist = self._zobrist
+        key, symmetry = zobrist.canonical(zobrist.board_hashes(board), str(mover))
+        x_bits, o_bits = board_bits(board, geometry)
+        remaining = geometry.size - (x_bits | o_bits).bit_count()
+        self.table.store(key, remaining, score, zobrist.to_canonical(move, symmetry), EXACT)
+
+    def _ordered_moves(self, occupied, ply, table_move):
+        killers = self._killers[ply]
+        first = [cell for cell in (table_move, killers[0], killers[1])
+                 if cell and not occupied >> (cell - 1) & 1]
+        moves = list(dict.fromkeys(first))  # Drop duplicates, keep order
+        moves.extend(cell for cell in self._geometry.static_order
+                     if cell not in moves and not occupied >> (cell - 1) & 1)
+        return moves
+
+    def _evaluate(self, mine, theirs):
+        """Heuristic score for the side to move: lines still open to each side"""
+        score = 0
+        weights = self._weights
+        for mask in self._geometry.line_masks:
+            own = (mine & mask).bit_count()
+            other = (theirs & mask).bit_count()
+            if not other:
+                score += weights[own]
+            elif not own:
+                score -= weights[other]
+        return max(-MAX_EVALUATION, min(MAX_EVALUATION, score))
+
+    def _negamax(self, mine, theirs, side, hashes, ply, depth, alpha, beta):
+        """Score of the position for side (to move), whose stones are mine"""
+        self.nodes += 1
+        if ply > self.max_ply:
+            self.max_ply = ply
+        if (self._deadline is not None or self._stop is not None) \
+                and self.nodes % self.CHECK_INTERVAL == 0 and self._must_stop():
+            raise _SearchTimeout
+        occupied = mine | theirs
+        if occupied == self._geometry.full_mask:
+            self.terminals += 1
+            return 0, None
+        if depth == 0:
+            return self._evaluate(mine, theirs), None
+
+        original_alpha = alpha
+        zobrist = self._zobrist
+        key, symmetry = zobrist.canonical(hashes, side)
+        entry = self.table.probe(key)
+        table_move = None
+        if entry is not None:
+            table_move = zobrist.from_canonical(entry.best_move, symmetry)
+            if entry.depth >= depth:
+                score = score_from_table(entry.score, ply)
+                if entry.bound == EXACT:
+                    return score, table_move
+                if entry.bound == LOWER_BOUND:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score, table_move
+
+        best_score, best_move = -WIN_SCORE - 1, None
+        opponent = _other(side)
+        masks_through = self._geometry.masks_through
+        first = self._root_move if ply == 0 and self._root_move else table_move
+        for cell in self._ordered_moves(occupied, ply, first):
+            bit = 1 << (cell - 1)
+            placed = mine | bit
+            if any(placed & mask == mask for mask in masks_through[cell]):
+                self.nodes += 1
+                self.terminals += 1
+                score = WIN_SCORE - ply - 1  # Winning right now beats anything else
+            else:
+                score, _ = self._negamax(theirs, placed, opponent,
+                                         zobrist.play(hashes, cell, side),
+                                         ply + 1, depth - 1, -beta, -alpha)
+                score = -score
+            if score > best_score:
+                best_score, best_move = score, cell
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.cutoffs += 1
+                killers = self._killers[ply]
+                if killers[0] != cell:
+                    killers[1], killers[0] = killers[0], cell
+                break
+
+        if best_score <= original_alpha:
+            bound = UPPER_BOUND
+        elif best_score >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.table.store(key, depth, score_to_table(best_score, ply),
+                         zobrist.to_canonical(best_move, symmetry), bound)
+        return best_score, best_move
+
+
+def plain_minimax_nodes(board) -> int:
+    """Nodes visited by a plain minimax (no pruning, no cache) from board"""
+    geometry = getattr(board, "geometry", STANDARD)
+    x_bits, o_bits = board_bits(board, geometry)
+
+    def count(mine, theirs):
+        nodes = 1
+        occupied = mine | theirs
+        for cell in geometry.cells:
+            bit = 1 << (cell - 1)
+            if occupied & bit:
+                continue
+            if is_win(mine | bit, cell, geometry) or occupied | bit == geometry.full_mask:
+                nodes += 1
+            else:
+                nodes += count(theirs, mine | bit)
+        return nodes
+
+    moves = (x_bits | o_bits).bit_count()
+    return count(x_bits, o_bits) if moves % 2 == 0 else count(o_bits, x_bits)
+
+
+# Shared by every player in the process so its table survives across moves and games
+DEFAULT_ENGINE = AlphaBetaEngine()
+
+
+if __name__ == "__main__":
+    empty_board = {cell: None for cell in STANDARD.cells}
+    result = AlphaBetaEngine().search(empty_board, 'X')
+    print(f"Empty board: best move {result.move}, score {result.score}")
+    print(f"  alpha-beta nodes: {result.nodes}")
+    print(f"  plain minimax nodes: {plain_minimax_nodes(empty_board)}")
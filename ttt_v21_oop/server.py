@@ -0,0 +1,264 @@
+"""
+Asyncio game server: many concurrent games in one process over TCP.
+
+Each connection is one session speaking JSON lines. Requests::
+
+    {"cmd": "new", "level": "minimax", "first": "human", "rows": 3, "cols": 3, "k": 3}
+    {"cmd": "move", "cell": 5}
+    {"cmd": "state"}
+    {"cmd": "stats"}
+    {"cmd": "quit"}
+
+``level`` is "minimax" (default) or "random" and ``first`` is "human" or
+"machine" (default); every field of "new" is optional. Every request gets
+one JSON line back: ``{"event": "state", ...}`` with the board, the free
+cells, the machine's reply and the status ("playing", "human_won",
+"machine_won" or "draw"), ``{"event": "stats", ...}`` or
+``{"event": "error", "message": ...}``.
+
+Machine moves run in a thread pool, so a slow search never stalls the other
+sessions; every thread has its own engine and all of them share one
+transposition table. Idle sessions are closed after ``idle_timeout``
+seconds, over-long lines and sessions beyond ``max_sessions`` are refused,
+writes wait for the client to drain its buffer, and at most
+``max_pending_moves`` machine moves wait for the pool at once.
+
+Usage::
+
+    python server.py [--host HOST] [--port PORT] [--threads N]
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from headless import HeadlessGame, PLAYING, WON
+from instrumentation import SearchMetrics
+from player import RandomMachinePlayer, MinimaxMachinePlayer
+from search import AlphaBetaEngine
+from symbol import Symbol
+from transposition_table import TranspositionTable
+
+DEFAULT_PORT = 8765
+LINE_LIMIT = 4096  # Bytes per request line
+MAX_CELLS = 400  # Largest board a client may ask for
+MAX_TIME_BUDGET = 10.0  # Seconds per machine move a client may ask for
+LEVELS = {"random": RandomMachinePlayer, "minimax": MinimaxMachinePlayer}
+
+
+class ProtocolError(Exception):
+    """A request the session cannot serve; its message goes back to the client"""
+
+
+class Session:
+    """One client's game: the board and the machine player facing it"""
+    def __init__(self, level="minimax", first="machine", rows=3, cols=3, k=3, time_budget=None):
+        if not isinstance(level, str) or level not in LEVELS:
+            raise ProtocolError(f"Unknown level: {level!r}")
+        if not isinstance(first, str) or first not in ("human", "machine"):
+            raise ProtocolError(f"Unknown first player: {first!r}")
+        if not all(isinstance(value, int) and not isinstance(value, bool) for value in (rows, cols, k)):
+            raise ProtocolError("rows, cols and k must be integers")
+        if rows * cols > MAX_CELLS:
+            raise ProtocolError(f"Boards are limited to {MAX_CELLS} cells")
+        if time_budget is not None and not (isinstance(time_budget, (int, float))
+                                            and not isinstance(time_budget, bool)
+                                            and 0 < time_budget <= MAX_TIME_BUDGET):
+            raise ProtocolError(f"time_budget must be between 0 and {MAX_TIME_BUDGET} seconds")
+        try:
+            self.game = HeadlessGame(rows=rows, cols=cols, k=k,
+                                     first=Symbol.AI if first == "machine" else Symbol.HUMAN)
+        except ValueError as error:
+            raise ProtocolError(str(error))
+        self.board = self.game.board
+        self.machine = LEVELS[level](Symbol.AI)
+        if isinstance(self.machine, MinimaxMachinePlayer):
+            self.machine.time_budget = time_budget
+        self.last_machine_move = None
+
+    @property
+    def machine_to_move(self) -> bool:
+        return self.game.status() == PLAYING and self.game.to_move == Symbol.AI
+
+    def status(self) -> str:
+        status = self.game.status()
+        if status == WON:
+            return "machine_won" if self.game.winner == Symbol.AI else "human_won"
+        return status
+
+    def human_move(self, cell):
+        if self.game.status() == PLAYING and self.game.to_move != Symbol.HUMAN:
+            raise ProtocolError("It is not your turn")
+        try:
+            self.game.apply(cell)
+        except ValueError as error:
+            raise ProtocolError(str(error))
+
+    def state(self) -> dict:
+        return {
+            "event": "state",
+            "rows": self.board.geometry.rows,
+            "cols": self.board.geometry.cols,
+            "board": [str(self.board[cell]) if self.board.is_cell_taken(cell) else None
+                      for cell in self.board.geometry.cells],
+            "free": self.board.get_free_cells(),
+            "machine_move": self.last_machine_move,
+            "status": self.status(),
+        }
+
+
+class GameServer:
+    """Serves one Session per TCP connection"""
+    def __init__(self, threads=4, idle_timeout=300.0, max_sessions=10_000, max_pending_moves=256):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="machine")
+        self._pending_moves = asyncio.Semaphore(max_pending_moves)
+        self._table = TranspositionTable(1 << 20)  # Shared by the engines of every thread
+        self._engines = threading.local()
+        self.latency = SearchMetrics()  # Move round trips, recorded as player "round_trip"
+        self.sessions = 0
+        self.peak_sessions = 0
+        self.total_sessions = 0
+        self.moves = 0
+        self.results = {"human_won": 0, "machine_won": 0, "draw": 0}
+
+    def _engine(self):
+        engine = getattr(self._engines, "engine", None)
+        if engine is None:
+            engine = self._engines.engine = AlphaBetaEngine(self._table)
+        return engine
+
+    def _machine_move(self, session):
+        """Runs in the pool: one engine per thread, since engines keep search state"""
+        machine = session.machine
+        if isinstance(machine, MinimaxMachinePlayer):
+            machine.engine = self._engine()
+        move = machine.select_move(session.board)
+        session.game.apply(move)
+        return move
+
+    async def _play_machine(self, session):
+        if not session.machine_to_move:
+            return
+        async with self._pending_moves:
+            loop = asyncio.get_running_loop()
+            session.last_machine_move = await loop.run_in_executor(
+                self.executor, self._machine_move, session)
+
+    def stats(self) -> dict:
+        return {
+            "event": "stats",
+            "sessions": self.sessions,
+            "peak_sessions": self.peak_sessions,
+            "total_sessions": self.total_sessions,
+            "moves": self.moves,
+            "results": dict(self.results),
+            "round_trip_p50": self.latency.percentile(0.50, "round_trip"),
+            "round_trip_p99": self.latency.percentile(0.99, "round_trip"),
+        }
+
+    async def _handle(self, session, request):
+        """Serve one request; returns (session, response)"""
+        if not isinstance(request, dict):
+            raise ProtocolError("Requests must be JSON objects")
+        command = request.get("cmd")
+        if command == "new":
+            options = {name: request[name] for name in
+                       ("level", "first", "rows", "cols", "k", "time_budget") if name in request}
+            session = Session(**options)
+            await self._play_machine(session)
+            return session, session.state()
+        if command == "stats":
+            return session, self.stats()
+        if session is None:
+            raise ProtocolError('Start a game first with {"cmd": "new"}')
+        if command == "state":
+            return session, session.state()
+        if command == "move":
+            started = time.perf_counter()
+            session.human_move(request.get("cell"))
+            await self._play_machine(session)
+            self.moves += 1
+            state = session.state()
+            self.latency.on_move("round_trip", time.perf_counter() - started)
+            if state["status"] != "playing":
+                self.results[state["status"]] += 1
+            return session, state
+        raise ProtocolError(f"Unknown command: {command!r}")
+
+    async def _send(self, writer, message):
+        writer.write(json.dumps(message).encode() + b"\n")
+        await writer.drain()  # Backpressure: wait while the client is not reading
+
+    async def serve_client(self, reader, writer):
+        if self.sessions >= self.max_sessions:
+            await self._send(writer, {"event": "error", "message": "Server busy"})
+            writer.close()
+            return
+        self.sessions += 1
+        self.total_sessions += 1
+        self.peak_sessions = max(self.peak_sessions, self.sessions)
+        session = None
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    await self._send(writer, {"event": "error", "message": "Idle timeout"})
+                    break
+                except ValueError:  # Longer than the reader's limit
+                    await self._send(writer, {"event": "error", "message": "Line too long"})
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:  # Not JSON, or not even UTF-8
+                    await self._send(writer, {"event": "error", "message": "Invalid JSON"})
+                    continue
+                if isinstance(request, dict) and request.get("cmd") == "quit":
+                    break
+                try:
+                    session, response = await self._handle(session, request)
+                except ProtocolError as error:
+                    response = {"event": "error", "message": str(error)}
+                await self._send(writer, response)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # The client went away
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Start listening and return the asyncio server"""
+        return await asyncio.start_server(self.serve_client, host, port, limit=LINE_LIMIT)
+
+
+async def serve(host, port, **options):
+    server = GameServer(**options)
+    listener = await server.start(host, port)
+    print(f"Serving on {', '.join(str(s.getsockname()) for s in listener.sockets)}")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Tic-Tac-Toe games over TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--threads", type=int, default=4, help="threads for machine moves")
+    parser.add_argument("--idle-timeout", type=float, default=300.0)
+    parser.add_argument("--max-sessions", type=int, default=10_000)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, threads=args.threads,
+                          idle_timeout=args.idle_timeout, max_sessions=args.max_sessions))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
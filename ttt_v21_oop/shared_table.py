@@ -0,0 +1,119 @@
+"""
+Transposition table in shared memory, used by several processes at once.
+
+The table is a ``multiprocessing.shared_memory`` block of 16-byte slots,
+two 64-bit words each: the entry packed into one word (score, depth, bound,
+best move and the id of the process that wrote it) and the key XOR that
+word in the other. Writes take no lock. A reader only accepts a slot whose
+two words XOR back to its key, so an entry torn by two processes writing
+the same slot at once reads as a miss instead of a wrong entry.
+
+The process that creates a table owns the block and frees it on ``close``,
+when the table is garbage collected or when the process exits. Pickling a
+table (to send it to a worker) sends only the block's name; the worker
+attaches to the block the first time and reuses that attachment afterwards.
+
+Hits on entries written by another process are counted in ``cross_hits``:
+work one worker did that another did not have to repeat.
+"""
+
+import os
+import weakref
+from multiprocessing import shared_memory
+from transposition_table import TranspositionTable, TableEntry, EXACT
+
+SLOT_BYTES = 16
+_SCORE_OFFSET = 1 << 23  # Scores are stored in 24 bits
+_MAX_DEPTH = 0xFF
+_MAX_MOVE = 0xFFF  # Larger cells are stored as "no move"
+
+_ATTACHED = weakref.WeakValueDictionary()  # Block name -> table of this process using it
+
+
+def _release(memory, words, owner):
+    words.release()
+    memory.close()
+    if owner:
+        memory.unlink()
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """TranspositionTable whose slots live in shared memory"""
+    def __init__(self, max_entries=1 << 16, policy="depth", name=None):
+        """Create a new table, or attach to the block called name"""
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown replacement policy: {policy!r}")
+        self.max_entries = max_entries
+        self.policy = policy
+        owner = name is None
+        self._memory = shared_memory.SharedMemory(name=name, create=owner,
+                                                  size=max_entries * SLOT_BYTES)
+        self.name = self._memory.name
+        self._words = self._memory.buf.cast("Q")
+        self._pid = os.getpid()
+        self._writer = self._pid & 0xFFFF
+        self.hits = self.misses = self.cross_hits = 0
+        _ATTACHED[self.name] = self
+        self._finalizer = weakref.finalize(self, _release, self._memory, self._words, owner)
+        if owner:
+            self.clear()
+
+    def __reduce__(self):
+        return _attach, (self.name, self.max_entries, self.policy)
+
+    def close(self):
+        """Detach from the block (and free it, in the process that created it)"""
+        _ATTACHED.pop(self.name, None)
+        self._finalizer()
+
+    def clear(self):
+        """Drop every entry (for every process) and reset this process' counters"""
+        self._memory.buf[:] = bytes(self.max_entries * SLOT_BYTES)
+        self.hits = self.misses = self.cross_hits = 0
+
+    def __len__(self):
+        words = self._words
+        return sum(1 for index in range(1, 2 * self.max_entries, 2) if words[index])
+
+    def probe(self, key):
+        """Return the entry stored for key, or None"""
+        index = 2 * (key % self.max_entries)
+        words = self._words
+        data = words[index + 1]
+        if data and words[index] ^ data == key:
+            self.hits += 1
+            if data >> 48 != self._writer:
+                self.cross_hits += 1
+            move = data >> 36 & _MAX_MOVE
+            return TableEntry(key, data >> 24 & _MAX_DEPTH, (data & 0xFFFFFF) - _SCORE_OFFSET,
+                              move or None, data >> 32 & 0xF)
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, best_move=None, bound=EXACT):
+        if not -_SCORE_OFFSET <= score < _SCORE_OFFSET:
+            raise ValueError(f"Score {score} does not fit in a shared table entry")
+        index = 2 * (key % self.max_entries)
+        words = self._words
+        current = words[index + 1]
+        depth = min(depth, _MAX_DEPTH)
+        if (current and words[index] ^ current != key and self.policy == "depth"
+                and depth < current >> 24 & _MAX_DEPTH):
+            return  # A deeper entry of another position stays
+        move = best_move if best_move and best_move <= _MAX_MOVE else 0
+        data = ((score + _SCORE_OFFSET) | depth << 24 | bound << 32 | move << 36
+                | self._writer << 48)
+        words[index + 1] = data
+        words[index] = key ^ data
+
+    def stats(self) -> dict:
+        return {**super().stats(), "cross_hits": self.cross_hits}
+
+
+def _attach(name, max_entries, policy):
+    table = _ATTACHED.get(name)
+    if table is None or table._pid != os.getpid():  # Forked workers inherit the parent's tables
+        table = SharedTranspositionTable(max_entries, policy, name)
+    return table
@@ -5,4 +5,8 @@ class Symbol(Enum):
     AI = 'X'
 
     def __str__(self):
-        return self.value
\ No newline at end of file
+        return self.value
+
+    @property
+    def opponent(self):
+        return Symbol.HUMAN if self is Symbol.AI else Symbol.AI
\ No newline at end of file
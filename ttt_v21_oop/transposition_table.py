@@ -0,0 +1,136 @@
+import random
+from collections import namedtuple
+from functools import lru_cache
+from board_geometry import STANDARD
+
+
+class Zobrist:
+    """
+    Zobrist hashing of positions reduced by the board symmetries.
+
+    One hash is kept per symmetry of the board geometry, all of them updated
+    incrementally on every move. The canonical key of a position is the
+    smallest of them, so the rotations and reflections of a position share a
+    single key.
+    """
+    def __init__(self, geometry=STANDARD, seed=0x7A7):
+        self.geometry = geometry
+        rng = random.Random(f"{seed}:{geometry.rows}x{geometry.cols}:{geometry.k}")
+        cell_keys = [[rng.getrandbits(64) for _ in range(2)] for _ in range(geometry.size + 1)]
+        self._side_keys = [rng.getrandbits(64) for _ in range(2)]
+        # _keys[s][cell][i]: key of symbol i on cell, seen through symmetry s
+        self._keys = [
+            [[cell_keys[permutation[cell]][i] for i in range(2)] for cell in range(geometry.size + 1)]
+            for permutation in geometry.symmetries
+        ]
+
+    @staticmethod
+    def _index(symbol) -> int:
+        return 0 if str(symbol) == 'X' else 1
+
+    def board_hashes(self, board) -> list:
+        """Compute the per-symmetry hashes of a board from scratch"""
+        hashes = [0] * len(self._keys)
+        for cell in self.geometry.cells:
+            symbol = board[cell]
+            if symbol is not None:
+                hashes = self.play(hashes, cell, symbol)
+        return hashes
+
+    def play(self, hashes, cell, symbol) -> list:
+        """Return the hashes after placing symbol on cell"""
+        i = self._index(symbol)
+        return [h ^ keys[cell][i] for h, keys in zip(hashes, self._keys)]
+
+    def canonical(self, hashes, mover):
+        """
+        Return the canonical key for a position with mover to play, together
+        with the symmetry that maps the position onto its canonical form.
+        """
+        key = min(hashes)
+        return key ^ self._side_keys[self._index(mover)], hashes.index(key)
+
+    def to_canonical(self, cell, symmetry):
+        return self.geometry.symmetries[symmetry][cell] if cell else None
+
+    def from_canonical(self, cell, symmetry):
+        return self.geometry.inverse_symmetries[symmetry][cell] if cell else None
+
+
+@lru_cache(maxsize=None)
+def zobrist_for(geometry) -> Zobrist:
+    """Return the (shared) Zobrist keys of a board geometry"""
+    return Zobrist(geometry)
+
+
+# Bound types: whether the stored score is exact or only a lower/upper bound
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+TableEntry = namedtuple("TableEntry", ["key", "depth", "score", "best_move", "bound"],
+                        defaults=[EXACT])
+
+
+class TranspositionTable:
+    """
+    Fixed-size transposition table of already searched positions.
+
+    Entries live in ``max_entries`` slots addressed by key. When two keys
+    compete for a slot the replacement policy decides who stays:
+
+    - ``"depth"``: keep the entry searched with more moves remaining, since it
+      stands for a bigger subtree.
+    - ``"always"``: the newest entry always wins.
+    """
+    POLICIES = ("depth", "always")
+
+    def __init__(self, max_entries=1 << 16, policy="depth"):
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown replacement policy: {policy!r}")
+        self.max_entries = max_entries
+        self.policy = policy
+        self.clear()
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        self._slots = [None] * self.max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return sum(entry is not None for entry in self._slots)
+
+    def probe(self, key):
+        """Return the entry stored for key, or None"""
+        entry = self._slots[key % self.max_entries]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, best_move=None, bound=EXACT):
+        slot = key % self.max_entries
+        current = self._slots[slot]
+        if (current is None or current.key == key or self.policy == "always"
+                or depth >= current.depth):
+            self._slots[slot] = TableEntry(key, depth, score, best_move, bound)
+
+    def hit_rate(self) -> float:
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+        }
+
+
+# Shared by every player in the process so it survives across moves and games
+ZOBRIST = zobrist_for(STANDARD)
+SHARED_TABLE = TranspositionTable()
@@ -1,29 +1,44 @@
-from game_board import GameBoard
-from player import HumanPlayer, RandomMachinePlayer, MinimaxMachinePlayer
+from board_backends import DEFAULT_BACKEND
+from headless import HeadlessGame, WON, DRAW
+from player import HumanPlayer, create_machine_player
 from game_messages import GameMessages
 from symbol import Symbol
+from perfect_play import default_table
+from parallel_search import warm_up
+from shared_table import SharedTranspositionTable
 
 
 class TicTacToeGame:
     """Manages the overall game flow"""
 
-    RANDOM = '1'
-    MINIMAX = '2'
+    LEVELS = {'1': "easy", '2': "medium", '3': "hard", '4': "expert"}
     
     FIRST_PLAYER_HUMAN = '1'
     FIRST_PLAYER_AI = '2'
                 
-    def __init__(self):
-        self.board = GameBoard()
+    def __init__(self, board_backend=DEFAULT_BACKEND, rows=3, cols=3, k=3, time_budget=None,
+                 instrumentation=None, workers=None, ponder=False, threads=False, shared_table=False):
+        self.game = HeadlessGame(board_backend, rows, cols, k)  # Rules and state, no I/O
+        self.board = self.game.board
+        self.time_budget = time_budget  # Seconds per machine move, None for the default
+        self.instrumentation = instrumentation  # Optional hooks, see instrumentation.py
+        self.workers = workers  # Processes for the machine's search, None for a serial search
+        self.threads = threads  # Search with threads instead of processes
+        # One table for all the workers, in shared memory
+        self.shared_table = SharedTranspositionTable() if shared_table and workers and workers > 1 else None
+        self.ponder = ponder  # Let the machine think during the human's turn
+        if workers is not None:
+            if workers < 1:
+                raise ValueError("At least one worker is needed")
+            if workers > 1 and not threads:
+                warm_up(workers)  # Start the processes now rather than on the first move
+        default_table()  # Map the perfect-play table, if there is one, before the first move
         
     def prompt_select_difficulty(self):
         while True:
             try:
-                difficulty = input(GameMessages.DIFFICULTY_PROMPT)
-                if difficulty == self.RANDOM:
-                    return RandomMachinePlayer
-                else: # default to Minimax
-                    return MinimaxMachinePlayer
+                difficulty = input(GameMessages.LEVEL_PROMPT)
+                return self.LEVELS.get(difficulty, "expert") # default to Expert
             except ValueError:
                 print(GameMessages.INVALID_INPUT)
 
@@ -42,33 +57,40 @@ class TicTacToeGame:
         """
         Main game loop
         """
-        machine_player = self.prompt_select_difficulty()
+        level = self.prompt_select_difficulty()
         current_symbol = self.prompt_select_first_player()
         
         players = { # Configure players dictionary
             Symbol.HUMAN: HumanPlayer(Symbol.HUMAN),
-            Symbol.AI: machine_player(Symbol.AI)
+            Symbol.AI: create_machine_player(level, Symbol.AI, time_budget=self.time_budget,
+                                             workers=self.workers, threads=self.threads,
+                                             shared_table=self.shared_table, ponder=self.ponder)
         }
+        players[Symbol.AI].instrumentation = self.instrumentation
         
+        self.game.reset()
+        self.game.first = current_symbol
         print(self.board)
         # Game loop
         while True:
-            current_player = players[current_symbol] # Get current player based on symbol
-            current_player.make_move(self.board) # Current player makes a move
+            current_player = players[self.game.to_move] # Get current player based on symbol
+            players[current_player.symbol.opponent].start_pondering(self.board)
+            status = self.game.apply(current_player.select_move(self.board)) # Current player moves
             print(self.board)
 
             # Check for win or draw
-            winner = self.board.check_winner()
-            if winner:
-                if winner == Symbol.AI:
+            if status == WON:
+                if self.game.winner == Symbol.AI:
                     print(GameMessages.MACHINE_WIN)
                 else:
                     print(GameMessages.HUMAN_WIN)
                 break
 
-            if self.board.is_board_full():
+            if status == DRAW:
                 print(GameMessages.DRAW)
                 break
 
-            # Switch turns
-            current_symbol = Symbol.AI if current_symbol == Symbol.HUMAN else Symbol.HUMAN
\ No newline at end of file
+        for player in players.values():
+            player.stop_pondering()
+        if self.instrumentation is not None:
+            self.instrumentation.on_game_end(self.game.winner, len(self.game.history))
\ No newline at end of file
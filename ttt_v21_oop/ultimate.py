@@ -0,0 +1,270 @@
+"""
+Ultimate Tic-Tac-Toe: nine 3x3 sub-boards laid out as a 3x3 board.
+
+A move in cell ``c`` of a sub-board sends the opponent to sub-board ``c``;
+when that sub-board is already decided (won or full) the opponent may play
+in any open sub-board. Winning a sub-board claims its square of the big
+board, and three claimed squares in a row win the game. When every
+sub-board is decided without that, the game is a draw.
+
+Moves are numbers 0-80: ``sub * 9 + cell``, both counted 0-8 row by row.
+Each side keeps one 9-bit mask per sub-board, so the win and full status of
+a sub-board are lookups in 512-entry tables, and the decided sub-boards are
+one more 9-bit mask. ``UltimateEngine`` is an iterative-deepening alpha-beta
+search with a transposition table that plays within a time budget per move.
+"""
+
+import random
+import time
+from player import MachinePlayer
+from search import (SearchResult, WIN_SCORE, WIN_THRESHOLD, MAX_EVALUATION,
+                    score_to_table, score_from_table)
+from transposition_table import EXACT, LOWER_BOUND, UPPER_BOUND
+
+FULL = 0b111111111
+CENTER = 1 << 4
+LINES = (0b000000111, 0b000111000, 0b111000000,  # Rows
+         0b001001001, 0b010010010, 0b100100100,  # Columns
+         0b100010001, 0b001010100)  # Diagonals
+
+# Lookup tables indexed by a 9-bit mask
+WINS = tuple(any(mask & line == line for line in LINES) for mask in range(512))
+CELLS = tuple(tuple(bit for bit in range(9) if mask >> bit & 1) for mask in range(512))
+TWOS = tuple(tuple(line for line in LINES if (mask & line).bit_count() == 2) for mask in range(512))
+
+DEFAULT_TIME_BUDGET = 1.0  # Seconds per machine move
+
+_rng = random.Random(81)
+_MOVE_KEYS = {side: tuple(_rng.getrandbits(64) for _ in range(81)) for side in "XO"}
+_NEXT_KEYS = {sub: _rng.getrandbits(64) for sub in (None, *range(9))}
+_SIDE_KEY = _rng.getrandbits(64)
+
+
+def _other(side):
+    return 'O' if side == 'X' else 'X'
+
+
+class UltimateBoard:
+    """Position of an Ultimate Tic-Tac-Toe game; sides are 'X' and 'O'"""
+    def __init__(self, first='X'):
+        self.stones = {'X': [0] * 9, 'O': [0] * 9}  # Side -> 9-bit mask per sub-board
+        self.claimed = {'X': 0, 'O': 0}  # Side -> 9-bit mask of the sub-boards it won
+        self.decided = 0  # Sub-boards won or full
+        self.next_sub = None  # Sub-board the side to move must play in, None for any
+        self.to_move = first
+        self.history = []  # (move, next_sub before it)
+        self.hash = _NEXT_KEYS[None]
+
+    @property
+    def winner(self):
+        """'X' or 'O' once a side has three sub-boards in a row, else None"""
+        for side in "XO":
+            if WINS[self.claimed[side]]:
+                return side
+        return None
+
+    def is_over(self) -> bool:
+        return self.winner is not None or self.decided == FULL
+
+    def legal_moves(self) -> list:
+        if self.winner is not None:
+            return []
+        x, o = self.stones['X'], self.stones['O']
+        subs = (self.next_sub,) if self.next_sub is not None else CELLS[FULL & ~self.decided]
+        return [sub * 9 + cell for sub in subs for cell in CELLS[FULL & ~(x[sub] | o[sub])]]
+
+    def make_move(self, move):
+        sub, cell = divmod(move, 9)
+        side = self.to_move
+        other = _other(side)
+        stones = self.stones[side][sub] | 1 << cell
+        self.stones[side][sub] = stones
+        if WINS[stones]:
+            self.claimed[side] |= 1 << sub
+            self.decided |= 1 << sub
+        elif stones | self.stones[other][sub] == FULL:
+            self.decided |= 1 << sub
+        self.history.append((move, self.next_sub))
+        next_sub = None if self.decided >> cell & 1 else cell
+        self.hash ^= (_MOVE_KEYS[side][move] ^ _NEXT_KEYS[self.next_sub]
+                      ^ _NEXT_KEYS[next_sub] ^ _SIDE_KEY)
+        self.next_sub = next_sub
+        self.to_move = other
+
+    def undo_move(self):
+        """Take back the last move"""
+        move, previous = self.history.pop()
+        sub, cell = divmod(move, 9)
+        side = _other(self.to_move)
+        self.stones[side][sub] &= ~(1 << cell)
+        # A sub-board is decided by the move into it, so taking that back reopens it
+        self.claimed[side] &= ~(1 << sub)
+        self.decided &= ~(1 << sub)
+        self.hash ^= (_MOVE_KEYS[side][move] ^ _NEXT_KEYS[self.next_sub]
+                      ^ _NEXT_KEYS[previous] ^ _SIDE_KEY)
+        self.next_sub = previous
+        self.to_move = side
+
+    def evaluate(self) -> int:
+        """Heuristic score for X: sub-boards and open lines on the big and small boards"""
+        x_claimed, o_claimed = self.claimed['X'], self.claimed['O']
+        drawn = self.decided & ~(x_claimed | o_claimed)
+        score = 0
+        for line in TWOS[x_claimed]:
+            if not line & (o_claimed | drawn):
+                score += 300
+        for line in TWOS[o_claimed]:
+            if not line & (x_claimed | drawn):
+                score -= 300
+        for sub in CELLS[x_claimed]:
+            score += 100 + 30 * (sub == 4)
+        for sub in CELLS[o_claimed]:
+            score -= 100 + 30 * (sub == 4)
+        x, o = self.stones['X'], self.stones['O']
+        for sub in CELLS[FULL & ~self.decided]:
+            mine, theirs = x[sub], o[sub]
+            for line in TWOS[mine]:
+                if not line & theirs:
+                    score += 15
+            for line in TWOS[theirs]:
+                if not line & mine:
+                    score -= 15
+            if mine & CENTER:
+                score += 3
+            elif theirs & CENTER:
+                score -= 3
+        return score
+
+    def __str__(self):
+        x, o = self.stones['X'], self.stones['O']
+        rows = []
+        for big_row in range(3):
+            if big_row:
+                rows.append("------+-------+------")
+            for row in range(3):
+                parts = []
+                for sub in range(3 * big_row, 3 * big_row + 3):
+                    parts.append(" ".join(
+                        'X' if x[sub] >> bit & 1 else 'O' if o[sub] >> bit & 1 else '.'
+                        for bit in range(3 * row, 3 * row + 3)))
+                rows.append(" | ".join(parts))
+        won = [f"{side}: {' '.join(str(sub + 1) for sub in CELLS[self.claimed[side]])}"
+               for side in "XO" if self.claimed[side]]
+        if won:
+            rows.append("Sub-boards won - " + ", ".join(won))
+        return "\n".join(rows)
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+class UltimateEngine:
+    """Iterative-deepening negamax alpha-beta with a transposition table"""
+    CHECK_INTERVAL = 1024  # Nodes between two looks at the clock
+
+    def __init__(self, table_size=1 << 20):
+        self.table = {}  # Position hash -> (depth, bound, score, best move)
+        self.table_size = table_size
+        self.nodes = 0
+        self.last_stats = None
+        self._deadline = None
+
+    def search(self, board, time_budget=DEFAULT_TIME_BUDGET, max_depth=None) -> SearchResult:
+        """Best move for the side to move, searching until time_budget or max_depth runs out"""
+        moves = board.legal_moves()
+        if not moves:
+            raise ValueError("The game is over")
+        if len(self.table) > self.table_size:
+            self.table.clear()
+        self.nodes = 0
+        self._deadline = None if time_budget is None else time.perf_counter() + time_budget
+        best = SearchResult(moves[0], 0, 0)
+        completed = 0
+        if len(moves) > 1:
+            depth = 1
+            while max_depth is None or depth <= max_depth:
+                try:
+                    score = self._negamax(board, depth, -WIN_SCORE, WIN_SCORE, 0)
+                except _SearchTimeout:
+                    break
+                best = SearchResult(self.table[board.hash][3], score, self.nodes)
+                completed = depth
+                if abs(score) > WIN_THRESHOLD or depth >= 81 - len(board.history):
+                    break  # Solved
+                depth += 1
+        self.last_stats = {"nodes": self.nodes, "max_depth": completed}
+        return SearchResult(best.move, best.score, self.nodes)
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes % self.CHECK_INTERVAL == 0 and self._deadline is not None \
+                and time.perf_counter() > self._deadline and ply:
+            raise _SearchTimeout
+        if WINS[board.claimed[_other(board.to_move)]]:
+            return -WIN_SCORE + ply  # The previous move won
+        moves = board.legal_moves()
+        if not moves:
+            return 0
+        if depth == 0:
+            score = board.evaluate()
+            score = max(-MAX_EVALUATION, min(MAX_EVALUATION, score))
+            return score if board.to_move == 'X' else -score
+
+        key = board.hash
+        entry = self.table.get(key)
+        if entry is not None:
+            entry_depth, bound, stored, table_move = entry
+            if entry_depth >= depth and ply:
+                stored = score_from_table(stored, ply)
+                if bound == EXACT:
+                    return stored
+                if bound == LOWER_BOUND and stored >= beta:
+                    return stored
+                if bound == UPPER_BOUND and stored <= alpha:
+                    return stored
+            if table_move in moves:
+                moves.remove(table_move)
+                moves.insert(0, table_move)
+
+        original_alpha = alpha
+        best_score, best_move = -WIN_SCORE, moves[0]
+        for move in moves:
+            board.make_move(move)
+            try:
+                score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.undo_move()
+            if score > best_score:
+                best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        bound = (UPPER_BOUND if best_score <= original_alpha
+                 else LOWER_BOUND if best_score >= beta else EXACT)
+        self.table[key] = (depth, bound, score_to_table(best_score, ply), best_move)
+        return best_score
+
+
+class UltimateMachinePlayer(MachinePlayer):
+    """Machine player searching with UltimateEngine"""
+    def __init__(self, symbol, time_budget=None, instrumentation=None):
+        super().__init__(symbol, instrumentation)
+        self.time_budget = time_budget  # Seconds per move; None for DEFAULT_TIME_BUDGET
+        self.engine = UltimateEngine()
+        self.last_search = None
+
+    def search_stats(self):
+        return self.engine.last_stats
+
+    def _select_move(self, board):
+        budget = DEFAULT_TIME_BUDGET if self.time_budget is None else self.time_budget
+        self.last_search = self.engine.search(board, budget)
+        return self.last_search.move
+
+
+class UltimateRandomPlayer(MachinePlayer):
+    """Machine player choosing among the legal moves at random"""
+    def _select_move(self, board):
+        return random.choice(board.legal_moves())
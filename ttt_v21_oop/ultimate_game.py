@@ -0,0 +1,71 @@
+from game_messages import GameMessages
+from player import Player
+from symbol import Symbol
+from ultimate import UltimateBoard, UltimateMachinePlayer, UltimateRandomPlayer
+
+
+class UltimateHumanPlayer(Player):
+    """Human player typing the sub-board and the cell of each move"""
+    def select_move(self, board):
+        """Prompt user for a legal move"""
+        legal = board.legal_moves()
+        while True:
+            try:
+                if board.next_sub is not None:
+                    sub = board.next_sub + 1
+                    cell = int(input(GameMessages.ULTIMATE_ENTER_CELL.format(sub=sub)))
+                else:
+                    sub, cell = map(int, input(GameMessages.ULTIMATE_ENTER_MOVE).split())
+            except ValueError:
+                print(GameMessages.INVALID_INPUT)
+                continue
+            move = (sub - 1) * 9 + cell - 1
+            if not (1 <= sub <= 9 and 1 <= cell <= 9) or move not in legal:
+                print(GameMessages.ULTIMATE_NOT_ALLOWED)
+                continue
+            return move
+
+
+class UltimateGame:
+    """Manages an Ultimate Tic-Tac-Toe game between a human and the machine"""
+
+    RANDOM = '1'
+    FIRST_PLAYER_HUMAN = '1'
+
+    def __init__(self, time_budget=None, instrumentation=None):
+        self.board = UltimateBoard()
+        self.time_budget = time_budget  # Seconds per machine move, None for the default
+        self.instrumentation = instrumentation  # Optional hooks, see instrumentation.py
+
+    def play(self):
+        """
+        Main game loop
+        """
+        if input(GameMessages.DIFFICULTY_PROMPT) == self.RANDOM:
+            machine = UltimateRandomPlayer(Symbol.AI)
+        else:
+            machine = UltimateMachinePlayer(Symbol.AI, self.time_budget)
+        machine.instrumentation = self.instrumentation
+        first = Symbol.HUMAN if input(GameMessages.FIRST_PLAYER_PROMPT) == self.FIRST_PLAYER_HUMAN \
+            else Symbol.AI
+        players = {str(Symbol.HUMAN): UltimateHumanPlayer(Symbol.HUMAN), str(Symbol.AI): machine}
+
+        self.board = board = UltimateBoard(str(first))
+        print(board)
+        while not board.is_over():
+            if board.next_sub is not None:
+                print(GameMessages.ULTIMATE_NEXT_SUB.format(sub=board.next_sub + 1))
+            else:
+                print(GameMessages.ULTIMATE_ANY_SUB)
+            board.make_move(players[board.to_move].select_move(board))
+            print(board)
+
+        winner = board.winner
+        if winner is None:
+            print(GameMessages.DRAW)
+        elif winner == str(Symbol.AI):
+            print(GameMessages.MACHINE_WIN)
+        else:
+            print(GameMessages.HUMAN_WIN)
+        if self.instrumentation is not None:
+            self.instrumentation.on_game_end(winner and Symbol(winner), len(board.history))